@@ -77,9 +77,7 @@ def get_alerts():
         return jsonify({"error": "Missing required fields"}), 400
 
     try:
-        alerts = ALERT_HANDLER.get_by_user_id(user_id)
-        for alert in alerts:
-            alert['_id'] = str(alert['_id'])
+        alerts = ALERT_HANDLER.get_by_user_id(user_id, projection=ALERT_HANDLER.LIST_PROJECTION, serialize_ids=True)
         return jsonify({"alerts": alerts}), 200
     
     except Exception as e:
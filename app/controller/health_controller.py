@@ -11,11 +11,11 @@ health_bp = Blueprint('health', __name__)
 
 def validate_user_trip(user_id=None, trip_id=None):
     if user_id:
-        user = USER_HANDLER.get_by_id("user_id", user_id)
+        user = USER_HANDLER.get_by_id("user_id", user_id, projection={"_id": 1})
         if not user:
             return False, "User not found"
     if trip_id:
-        trip = TRIP_HANDLER.get_by_id("trip_id", trip_id)
+        trip = TRIP_HANDLER.get_by_id("trip_id", trip_id, projection={"_id": 1})
         if not trip:
             return False, "Trip not found"
     return True, ""
@@ -79,8 +79,7 @@ def simulate_scenario():
         time_interval=time_interval
     )
 
-    for point in points:
-        HEALTH_DATA_HANDLER.add_health_data(user_id, point)
+    HEALTH_DATA_HANDLER.add_health_data_bulk(user_id, points)
 
     return jsonify({"message": f"Simulated {len(points)} health data points for scenario '{scenario}'"}), 200
 
@@ -99,9 +98,7 @@ def get_health_data():
         return jsonify({"error": msg}), 400
     
     try:
-        health_data = HEALTH_DATA_HANDLER.get_health_data(user_id, trip_id)
-        for record in health_data:
-            record['_id'] = str(record['_id'])
+        health_data = HEALTH_DATA_HANDLER.get_health_data(user_id, trip_id, serialize_ids=True)
         return jsonify({"health_data": health_data}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -121,7 +118,7 @@ def generate_health_alert():
     if not is_valid:
         return jsonify({"error": msg}), 400
 
-    context = TRIP_HANDLER.get_by_id("trip_id", trip_id).get("context", "")
+    context = TRIP_HANDLER.get_by_id("trip_id", trip_id, projection={"context": 1}).get("context", "")
     print("Context:", context)
 
     try:
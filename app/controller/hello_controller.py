@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify, request
 from app.service.hello_service import get_hello_message
+from app.llms.utils.http_client import HTTP_CLIENT
+from app.llms.utils.response_cache import default_response_cache
 from app.mongo.fsq_handlers import (
     USER_HANDLER, TRIP_HANDLER, HEALTH_DATA_HANDLER, ALERT_HANDLER
 )
@@ -10,6 +12,14 @@ hello_blueprint = Blueprint('hello', __name__)
 def hello():
     return jsonify(get_hello_message()), 200
 
+@hello_blueprint.route('/http-stats', methods=['GET'])
+def http_stats():
+    return jsonify(HTTP_CLIENT.metrics()), 200
+
+@hello_blueprint.route('/llm-cache-stats', methods=['GET'])
+def llm_cache_stats():
+    return jsonify(default_response_cache().stats()), 200
+
 @hello_blueprint.route('/reset', methods=['POST'])
 def reset():
     data = request.json
@@ -67,10 +67,11 @@ def get_user_details():
         return jsonify({"error": "Missing required fields"}), 400
 
     try:
-        user_details = USER_HANDLER.get_by_id("user_id", user_id)
+        user_details = USER_HANDLER.get_by_id(
+            "user_id", user_id, projection=USER_HANDLER.DETAILS_PROJECTION, serialize_ids=True
+        )
         if not user_details:
             return jsonify({"error": "User not found"}), 404
-        user_details["_id"] = str(user_details["_id"])
         return jsonify(user_details), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -203,9 +204,9 @@ def get_user_trips():
         return jsonify({"error": "Missing required fields"}), 400
 
     try:
-        trips = TRIP_HANDLER.get_all_trips_for_user(user_id)
-        for trip in trips:
-            trip['_id'] = str(trip['_id'])
+        trips = TRIP_HANDLER.get_all_trips_for_user(
+            user_id, projection=TRIP_HANDLER.LIST_PROJECTION, serialize_ids=True
+        )
         return jsonify({"trips": trips}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
\ No newline at end of file
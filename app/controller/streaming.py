@@ -0,0 +1,29 @@
+import json
+from flask import Response, stream_with_context
+
+
+def sse_response(chunks):
+    """
+    Forward an iterable of text chunks (e.g. GeminiSimpleChatEngine.stream or
+    LangchainOpenaiSimpleChatEngine.stream) to the client as server-sent events.
+    Each chunk is sent as `data: {"text": ...}`; the stream ends with a `done` event,
+    or an `error` event if the generator raises.
+    Usage:
+        return sse_response(engine.stream(query))
+    """
+    def generate():
+        try:
+            for chunk in chunks:
+                yield f"data: {json.dumps({'text': chunk})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # stop nginx-style proxies from buffering the stream
+        }
+    )
@@ -1,10 +1,20 @@
 import os
+import json
+import asyncio
+import weakref
+import threading
+from contextlib import contextmanager, ExitStack
+import httpx
 import google.auth
 import google.auth.transport.requests
 from google.oauth2 import service_account
 import requests
 from .utils.tool_formatter import pydantic_schema_to_tool_format, dict_to_tool_format
 from .utils.logger import LOGGER
+from .utils.http_client import HTTP_CLIENT
+from .utils.rate_limiter import RateLimiter, backoff_delay, retry_after_seconds
+from .utils.response_cache import ResponseCache
+from datetime import datetime
 import time
 
 
@@ -14,26 +24,232 @@ import time
 # For Rate Limiting: https://ai.google.dev/gemini-api/docs/rate-limits
 ####################################################################################################
 
-def make_request_with_retries(max_retries=5, wait_time=30, *args, **kwargs):
-    retries = 0
-    while retries < max_retries:
-        response = requests.post(*args, **kwargs)
-        
-        if response.status_code == 429:
-            retries += 1
-            LOGGER.warning(f"Rate limit hit. Retrying in {wait_time} seconds... (Attempt {retries}/{max_retries})")
-            time.sleep(wait_time)
+# Generation can take well over the default read timeout
+GEMINI_TIMEOUT = (HTTP_CLIENT.timeout[0], float(os.getenv("GEMINI_READ_TIMEOUT", "120")))
+METADATA_TIMEOUT = (2, 5)
+
+
+RETRY_STATUS_CODES = (429, 500, 503)
+
+# Per-model quotas, e.g. GEMINI_RATE_LIMITS='{"gemini-1.5-flash-002": {"rpm": 200, "tpm": 4000000}}'.
+# Models not listed use the defaults. One limiter per model is shared by every GeminiModel in the process.
+GEMINI_RATE_LIMITS = json.loads(os.getenv("GEMINI_RATE_LIMITS", "{}"))
+GEMINI_DEFAULT_RPM = float(os.getenv("GEMINI_DEFAULT_RPM", "60"))
+GEMINI_DEFAULT_TPM = float(os.getenv("GEMINI_DEFAULT_TPM", "1000000"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+
+_RATE_LIMITERS = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(model_name):
+    with _RATE_LIMITERS_LOCK:
+        if model_name not in _RATE_LIMITERS:
+            limits = GEMINI_RATE_LIMITS.get(model_name, {})
+            _RATE_LIMITERS[model_name] = RateLimiter(
+                rpm=limits.get("rpm", GEMINI_DEFAULT_RPM),
+                tpm=limits.get("tpm", GEMINI_DEFAULT_TPM),
+                max_concurrency=limits.get("max_concurrency", GEMINI_MAX_CONCURRENCY)
+            )
+        return _RATE_LIMITERS[model_name]
+
+
+# httpx.AsyncClient is bound to the event loop it was first used on, so keep one per loop
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+
+
+def _async_client():
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None:
+        client = _ASYNC_CLIENTS[loop] = httpx.AsyncClient(
+            timeout=httpx.Timeout(GEMINI_TIMEOUT[1], connect=GEMINI_TIMEOUT[0]),
+            limits=httpx.Limits(max_connections=GEMINI_MAX_CONCURRENCY * 2, max_keepalive_connections=GEMINI_MAX_CONCURRENCY)
+        )
+    return client
+
+
+def make_request_with_retries(max_retries=5, wait_time=30, *args, limiter=None, tokens=1, **kwargs):
+    """
+    POST with the shared rate limiter; 429/5xx are retried with exponential backoff and
+    jitter capped at wait_time seconds, honoring Retry-After when the server sends it.
+    """
+    kwargs.setdefault("timeout", GEMINI_TIMEOUT)
+    for attempt in range(max_retries):
+        if limiter is None:
+            response = HTTP_CLIENT.post(*args, **kwargs)
         else:
+            with limiter.limit(tokens):
+                response = HTTP_CLIENT.post(*args, **kwargs)
+
+        if response.status_code not in RETRY_STATUS_CODES:
             return response  # Return response if successful or any other error
-    
+        response.close()
+        delay = backoff_delay(attempt, cap=wait_time, retry_after=retry_after_seconds(response.headers))
+        LOGGER.warning(f"Gemini returned {response.status_code}. Retrying in {delay:.1f} seconds... (Attempt {attempt + 1}/{max_retries})")
+        time.sleep(delay)
+
+    LOGGER.critical(f"Failed after {max_retries} retries due to rate limiting.")
+    raise Exception(f"Failed after {max_retries} retries due to rate limiting.")
+
+
+@contextmanager
+def stream_request_with_retries(max_retries=5, wait_time=30, *args, limiter=None, tokens=1, **kwargs):
+    """
+    Streaming counterpart of make_request_with_retries, used as a context manager.
+    The limiter's concurrency slot is held until the caller has finished reading the body,
+    and every retried response is closed before backing off.
+    """
+    kwargs.setdefault("timeout", GEMINI_TIMEOUT)
+    for attempt in range(max_retries):
+        with ExitStack() as stack:
+            if limiter is not None:
+                stack.enter_context(limiter.limit(tokens))
+            response = stack.enter_context(HTTP_CLIENT.post(*args, stream=True, **kwargs))
+            if response.status_code not in RETRY_STATUS_CODES:
+                yield response
+                return
+            retry_after = retry_after_seconds(response.headers)
+        delay = backoff_delay(attempt, cap=wait_time, retry_after=retry_after)
+        LOGGER.warning(f"Gemini returned {response.status_code}. Retrying in {delay:.1f} seconds... (Attempt {attempt + 1}/{max_retries})")
+        time.sleep(delay)
+
     LOGGER.critical(f"Failed after {max_retries} retries due to rate limiting.")
     raise Exception(f"Failed after {max_retries} retries due to rate limiting.")
 
 
+async def make_request_with_retries_async(max_retries=5, wait_time=30, url=None, limiter=None, tokens=1, **kwargs):
+    """
+    Non-blocking counterpart of make_request_with_retries: waits for the limiter and
+    backs off with asyncio.sleep, so the event loop keeps serving other requests.
+    """
+    client = _async_client()
+    for attempt in range(max_retries):
+        if limiter is None:
+            response = await client.post(url, **kwargs)
+        else:
+            async with limiter.alimit(tokens):
+                response = await client.post(url, **kwargs)
+
+        if response.status_code not in RETRY_STATUS_CODES:
+            return response
+        await response.aclose()
+        delay = backoff_delay(attempt, cap=wait_time, retry_after=retry_after_seconds(response.headers))
+        LOGGER.warning(f"Gemini returned {response.status_code}. Retrying in {delay:.1f} seconds... (Attempt {attempt + 1}/{max_retries})")
+        await asyncio.sleep(delay)
+
+    LOGGER.critical(f"Failed after {max_retries} retries due to rate limiting.")
+    raise Exception(f"Failed after {max_retries} retries due to rate limiting.")
+
+
+class CredentialProvider:
+    """
+    Process-wide cache of the Vertex AI access token, project and location.
+    The token is fetched once, then refreshed by a daemon thread REFRESH_MARGIN seconds
+    before it expires, so requests read a valid cached token and never wait on a refresh
+    (unless every background attempt failed and the token actually expired).
+    Use get_credential_provider() to share one instance per auth mode.
+    """
+
+    REFRESH_MARGIN = 300
+    RETRY_INTERVAL = 30
+    METADATA_URL = "http://metadata.google.internal/computeMetadata/v1"
+
+    def __init__(self, deployed_gcp=False):
+        self.deployed_gcp = deployed_gcp
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+        self._credentials = None
+
+        if deployed_gcp:
+            self.project_id = self._get_metadata_gcp("project/project-id")
+            full_zone = self._get_metadata_gcp("instance/zone")  # e.g., projects/12345/zones/us-central1-a
+            self.project_location = full_zone.split("/")[-1].rsplit("-", 1)[0]  # Extracts 'us-central1' from 'us-central1-a'
+        else:
+            self.project_id = os.environ["GOOGLE_CLOUD_PROJECT"]
+            self.project_location = os.environ["GOOGLE_CLOUD_LOCATION"]
+
+        self._refresh()
+        threading.Thread(target=self._refresh_loop, daemon=True).start()
+
+    ####################################################################################################
+    # Service account authentication from outside a GCP Environment using a service account key.
+    def _get_access_token(self):
+        """Returns (token, seconds until expiry) using service account credentials."""
+        if self._credentials is None:
+            self._credentials = service_account.Credentials.from_service_account_file(
+                os.environ["GOOGLE_APPLICATION_CREDENTIALS"],
+                scopes=["https://www.googleapis.com/auth/cloud-platform"]
+            )
+        self._credentials.refresh(google.auth.transport.requests.Request(session=HTTP_CLIENT.session))
+        expiry = self._credentials.expiry  # naive UTC
+        expires_in = (expiry - datetime.utcnow()).total_seconds() if expiry else 3600
+        return self._credentials.token, expires_in
+
+    ####################################################################################################
+    # GCP metadata server authentication from inside a deployed GCP Environment.
+    def _get_access_token_gcp(self):
+        """Returns (token, seconds until expiry) from the metadata server."""
+        response = HTTP_CLIENT.get(f"{self.METADATA_URL}/instance/service-accounts/default/token", headers={"Metadata-Flavor": "Google"}, timeout=METADATA_TIMEOUT)
+        token = response.json()
+        return token["access_token"], token.get("expires_in", 3600)
+
+    def _get_metadata_gcp(self, path):
+        """Fetches metadata from GCP metadata server."""
+        response = HTTP_CLIENT.get(f"{self.METADATA_URL}/{path}", headers={"Metadata-Flavor": "Google"}, timeout=METADATA_TIMEOUT)
+        return response.text
+
+    def _refresh(self):
+        try:
+            token, expires_in = self._get_access_token_gcp() if self.deployed_gcp else self._get_access_token()
+        except Exception as e:
+            raise RuntimeError(f"Error obtaining access token: {str(e)}")
+        with self._lock:
+            self._token = token
+            self._expires_at = time.time() + expires_in
+        LOGGER.debug(f"Refreshed Vertex AI access token, valid for {int(expires_in)}s")
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(max(self._expires_at - time.time() - self.REFRESH_MARGIN, self.RETRY_INTERVAL))
+            try:
+                self._refresh()
+            except RuntimeError as e:
+                LOGGER.error(f"Background token refresh failed, retrying in {self.RETRY_INTERVAL}s: {str(e)}")
+
+    def token(self):
+        with self._lock:
+            if time.time() < self._expires_at:
+                return self._token
+        # Only reached if background refreshes kept failing until expiry
+        self._refresh()
+        return self._token
+
+    def headers(self):
+        return {
+            "Authorization": f"Bearer {self.token()}",
+            "Content-Type": "application/json"
+        }
+
+
+_CREDENTIAL_PROVIDERS = {}
+_CREDENTIAL_PROVIDERS_LOCK = threading.Lock()
+
+
+def get_credential_provider(deployed_gcp=False):
+    with _CREDENTIAL_PROVIDERS_LOCK:
+        if deployed_gcp not in _CREDENTIAL_PROVIDERS:
+            _CREDENTIAL_PROVIDERS[deployed_gcp] = CredentialProvider(deployed_gcp)
+        return _CREDENTIAL_PROVIDERS[deployed_gcp]
+
+
 class GeminiModel:
     def __init__(self, model_name, temperature=0.7, max_output_tokens=1024, max_retries=5, wait_time=30, deployed_gcp=False):
         """
         Initialize the GeminiModel with model configuration.
+        Credentials come from the shared CredentialProvider, so only the first model
+        in the process pays for authentication.
 
         :param model_name: The model identifier (e.g., "gemini-1.0-pro-002")
         :param temperature: Sampling temperature for response diversity.
@@ -41,78 +257,29 @@ class GeminiModel:
         """
         try:
             try:
-                if deployed_gcp:
-                    self._access_token = self._get_access_token_gcp()
-                    self._project_id = self._get_project_id_gcp()
-                    self._project_location = self._get_project_location_gcp()
-                else:
-                    self._access_token = self._get_access_token()
-                    self._project_id = self._get_project_id()
-                    self._project_location = self._get_project_location()
+                self.credentials = get_credential_provider(deployed_gcp)
+                self._project_id = self.credentials.project_id
+                self._project_location = self.credentials.project_location
             except Exception as e:
                 LOGGER.error(f"Failed to authenticate: {str(e)}")
                 raise RuntimeError(f"Failed to authenticate: {str(e)}")
 
             self._model_name = model_name
+            self.limiter = get_rate_limiter(model_name)
             self.temperature = temperature
             self.max_output_tokens = max_output_tokens
             self.max_retries = max_retries
             self.wait_time = wait_time
-            self.headers = {
-                "Authorization": f"Bearer {self._access_token}",
-                "Content-Type": "application/json"
-            }
 
             LOGGER.debug(f"Initialized GeminiModel with model {model_name} , project {self._project_id}, location {self._project_location}")
         except Exception as e:
             LOGGER.error(f"Failed to initialize GeminiModel: {str(e)}")
             raise RuntimeError(f"Failed to initialize GeminiModel: {str(e)}")
 
-    ####################################################################################################
-    # The following authentication methods are used for service account authentication from outside a GCP Environment using a service account key.
-    def _get_access_token(self):
-        """Retrieve an access token using service account credentials."""
-        try:
-            credentials = service_account.Credentials.from_service_account_file(
-                os.environ["GOOGLE_APPLICATION_CREDENTIALS"],
-                scopes=["https://www.googleapis.com/auth/cloud-platform"]
-            )
-            credentials.refresh(google.auth.transport.requests.Request())
-            return credentials.token
-        except Exception as e:
-            raise RuntimeError(f"Error obtaining access token: {str(e)}")
-
-    def _get_project_id(self):
-        """Retrieve the project ID from environment variables or config."""
-        return os.environ["GOOGLE_CLOUD_PROJECT"]
-
-    def _get_project_location(self):
-        """Retrieve the project location from environment variables or config."""
-        return os.environ["GOOGLE_CLOUD_LOCATION"]
-    
-
-    ####################################################################################################
-    # The following authentication methods are used for GCP metadata server authentication from inside a deployed GCP Environment.
-    def _get_access_token_gcp(self):
-        """Fetches an access token for authentication with Vertex AI."""
-        METADATA_URL = "http://metadata.google.internal/computeMetadata/v1"
-        response = requests.get(f"{METADATA_URL}/instance/service-accounts/default/token", headers={"Metadata-Flavor": "Google"})
-        return response.json()["access_token"]
-    
-    def _get_metadata_gcp(self, path):
-        """Fetches metadata from GCP metadata server."""
-        METADATA_URL = "http://metadata.google.internal/computeMetadata/v1"
-        response = requests.get(f"{METADATA_URL}/{path}", headers={"Metadata-Flavor": "Google"})
-        return response.text
-
-    def _get_project_id_gcp(self):
-        return self.get_metadata("project/project-id")
-
-    def _get_project_location_gcp(self):
-        full_zone = self.get_metadata("instance/zone")  # e.g., projects/12345/zones/us-central1-a
-        return full_zone.split("/")[-1].rsplit("-", 1)[0]  # Extracts 'us-central1' from 'us-central1-a'
-
-    
+    @property
+    def headers(self):
+        """Request headers with the current access token."""
+        return self.credentials.headers()
 
     def _validate_args(self, arg, type:str):
         if type == "content_role_list":
@@ -221,6 +388,13 @@ class GeminiModel:
             LOGGER.error(f"Error constructing function call payload: {str(e)}")
             raise ValueError(f"Error constructing function call payload: {str(e)}")
 
+    def _generate_url(self, method="generateContent"):
+        return f"https://{self._project_location}-aiplatform.googleapis.com/v1/projects/{self._project_id}/locations/{self._project_location}/publishers/google/models/{self._model_name}:{method}"
+
+    def _estimate_tokens(self, payload):
+        """Rough prompt size (~4 characters per token) plus the output budget, for the TPM bucket."""
+        return len(json.dumps(payload)) // 4 + self.max_output_tokens
+
     def generate_content(self, content_role_list, system_instructions=None,simplify_output=False):
         """
         Send a request for content generation.
@@ -230,9 +404,9 @@ class GeminiModel:
         :return: Generated content response.
         """
         try:
-            url = f"https://{self._project_location}-aiplatform.googleapis.com/v1/projects/{self._project_id}/locations/{self._project_location}/publishers/google/models/{self._model_name}:generateContent"
             payload = self._create_payload_for_generate(content_role_list, system_instructions)
-            response = make_request_with_retries(self.max_retries, self.wait_time, url, headers=self.headers, json=payload)
+            response = make_request_with_retries(self.max_retries, self.wait_time, self._generate_url(), headers=self.headers, json=payload,
+                                                 limiter=self.limiter, tokens=self._estimate_tokens(payload))
             response.raise_for_status()
             response = response.json()
             if simplify_output:
@@ -242,6 +416,50 @@ class GeminiModel:
             LOGGER.error(f"Error generating content: {str(e)}")
             raise RuntimeError(f"Error generating content: {str(e)}")
 
+    def stream_content(self, content_role_list, system_instructions=None):
+        """
+        Stream generated text via streamGenerateContent (server-sent events).
+
+        :param content_role_list: List of dicts with role and content.
+        :param system_instructions: Optional system-level instructions.
+        :return: Generator of text chunks as they are produced.
+        """
+        payload = self._create_payload_for_generate(content_role_list, system_instructions)
+        try:
+            # The rate limiter slot stays held until the stream is consumed or the generator is closed
+            with stream_request_with_retries(self.max_retries, self.wait_time, self._generate_url("streamGenerateContent?alt=sse"),
+                                             headers=self.headers, json=payload,
+                                             limiter=self.limiter, tokens=self._estimate_tokens(payload)) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    event = json.loads(line[len("data:"):])
+                    for candidate in event.get("candidates", [])[:1]:
+                        for part in candidate.get("content", {}).get("parts", []):
+                            if part.get("text"):
+                                yield part["text"]
+        except requests.exceptions.RequestException as e:
+            LOGGER.error(f"Error streaming content: {str(e)}")
+            raise RuntimeError(f"Error streaming content: {str(e)}")
+
+    async def agenerate_content(self, content_role_list, system_instructions=None, simplify_output=False):
+        """
+        Async version of generate_content.
+        """
+        try:
+            payload = self._create_payload_for_generate(content_role_list, system_instructions)
+            response = await make_request_with_retries_async(self.max_retries, self.wait_time, self._generate_url(), headers=self.headers, json=payload,
+                                                             limiter=self.limiter, tokens=self._estimate_tokens(payload))
+            response.raise_for_status()
+            response = response.json()
+            if simplify_output:
+                response = response["candidates"][0]['content']['parts'][0]['text']
+            return response
+        except httpx.HTTPError as e:
+            LOGGER.error(f"Error generating content: {str(e)}")
+            raise RuntimeError(f"Error generating content: {str(e)}")
+
     def generate_funccall_content(self, content_role_list, tools, system_instructions=None, simplify_output=False):
         """
         Send a request for function calling.
@@ -251,9 +469,9 @@ class GeminiModel:
         :return: Function call response.
         """
         try:
-            url = f"https://{self._project_location}-aiplatform.googleapis.com/v1/projects/{self._project_id}/locations/{self._project_location}/publishers/google/models/{self._model_name}:generateContent"
             payload = self._create_payload_for_generate_funccall(content_role_list, tools, system_instructions)
-            response = make_request_with_retries(self.max_retries, self.wait_time, url, headers=self.headers, json=payload)
+            response = make_request_with_retries(self.max_retries, self.wait_time, self._generate_url(), headers=self.headers, json=payload,
+                                                 limiter=self.limiter, tokens=self._estimate_tokens(payload))
             response.raise_for_status()
             response = response.json()
             if simplify_output:
@@ -264,6 +482,23 @@ class GeminiModel:
             LOGGER.error(f"Error generating function call content: {str(e)}")
             raise RuntimeError(f"Error generating function call content: {str(e)}")
 
+    async def agenerate_funccall_content(self, content_role_list, tools, system_instructions=None, simplify_output=False):
+        """
+        Async version of generate_funccall_content.
+        """
+        try:
+            payload = self._create_payload_for_generate_funccall(content_role_list, tools, system_instructions)
+            response = await make_request_with_retries_async(self.max_retries, self.wait_time, self._generate_url(), headers=self.headers, json=payload,
+                                                             limiter=self.limiter, tokens=self._estimate_tokens(payload))
+            response.raise_for_status()
+            response = response.json()
+            if simplify_output:
+                response = [r['functionCall'] for r in response["candidates"][0]['content']['parts']]
+            return response
+        except httpx.HTTPError as e:
+            LOGGER.error(f"Error generating function call content: {str(e)}")
+            raise RuntimeError(f"Error generating function call content: {str(e)}")
+
 
 
 
@@ -273,7 +508,8 @@ class GeminiModel:
 ####################################################################################################
 
 class GeminiJsonEngine():
-    def __init__(self, model_name, basemodel, temperature, max_output_tokens, systemInstructions, max_retries=5, wait_time=30, deployed_gcp=False):
+    def __init__(self, model_name, basemodel, temperature, max_output_tokens, systemInstructions, max_retries=5, wait_time=30, deployed_gcp=False,
+                 response_cache: ResponseCache=None):
         self.model = GeminiModel(model_name=model_name, temperature=temperature, max_output_tokens=max_output_tokens, max_retries=max_retries, wait_time=wait_time, deployed_gcp=deployed_gcp)
         self.content_roles = []
         if systemInstructions:
@@ -283,20 +519,57 @@ class GeminiJsonEngine():
             self.schema = dict_to_tool_format(basemodel)
         else:
             self.schema = pydantic_schema_to_tool_format(basemodel)
+
+        # Opt-in: identical (or, if the cache is semantic, similar) queries are answered from the cache
+        self.response_cache = response_cache
+        self.cache_namespace = ResponseCache.namespace(model_name, systemInstructions, self.schema, temperature)
     
+    def _content_roles(self, user_query):
+        if isinstance(user_query, str):
+            return self.content_roles + [{"role": "user", "content": user_query}]
+        elif isinstance(user_query, list):
+            return self.content_roles + [{"role": "user", "content": item} for item in user_query]
+        else:
+            raise ValueError("Input must be a string or list")
+
     def run(self, user_query):
         """
         Input: user_query: List[str] or str
         Output: response: List[Dict]
         """
-        if isinstance(user_query, str):
-            _content_roles = self.content_roles + [{"role": "user", "content": user_query}]
-        elif isinstance(user_query, list):
-            _content_roles = self.content_roles + [{"role": "user", "content": item} for item in user_query]
-        else:
-            raise ValueError("Input must be a string or list")
-        response = self.model.generate_funccall_content(_content_roles, tools=[self.schema], simplify_output=True)
-        return [r['args'] for r in response]
+        if self.response_cache is not None:
+            cached = self.response_cache.get(self.cache_namespace, user_query)
+            if cached is not None:
+                return cached
+
+        start = time.perf_counter()
+        response = self.model.generate_funccall_content(self._content_roles(user_query), tools=[self.schema], simplify_output=True)
+        response = [r['args'] for r in response]
+        self._cache_response(user_query, response, time.perf_counter() - start)
+        return response
+
+    async def arun(self, user_query):
+        """
+        Async version of run; waits on rate limits and retries without blocking the event loop.
+        """
+        if self.response_cache is not None:
+            cached = self.response_cache.get(self.cache_namespace, user_query)
+            if cached is not None:
+                return cached
+
+        start = time.perf_counter()
+        response = await self.model.agenerate_funccall_content(self._content_roles(user_query), tools=[self.schema], simplify_output=True)
+        response = [r['args'] for r in response]
+        self._cache_response(user_query, response, time.perf_counter() - start)
+        return response
+
+    def _cache_response(self, user_query, response, seconds):
+        if self.response_cache is not None:
+            self.response_cache.record_miss(seconds)
+            self.response_cache.put(self.cache_namespace, user_query, response)
+
+    def cache_stats(self):
+        return self.response_cache.stats() if self.response_cache is not None else None
     
 
 
@@ -312,20 +585,34 @@ class GeminiSimpleChatEngine:
         if systemInstructions:
             self.content_roles.append({"role": "user", "content": systemInstructions})
     
+    def _content_roles(self, user_query):
+        if isinstance(user_query, str):
+            return self.content_roles + [{"role": "user", "content": user_query}]
+        elif isinstance(user_query, list):
+            return self.content_roles + [{"role": "user", "content": item} for item in user_query]
+        else:
+            raise ValueError("Input must be a string or list")
+
     def run(self, user_query):
         """
         Input: user_query: List[str] or str
         Output: response: str
         """
-        if isinstance(user_query, str):
-            _content_roles = self.content_roles + [{"role": "user", "content": user_query}]
-        elif isinstance(user_query, list):
-            _content_roles = self.content_roles + [{"role": "user", "content": item} for item in user_query]
-        else:
-            raise ValueError("Input must be a string or list")
-        
-        response = self.model.generate_content(_content_roles, simplify_output=True)
+        response = self.model.generate_content(self._content_roles(user_query), simplify_output=True)
         return response
+
+    async def arun(self, user_query):
+        """
+        Async version of run.
+        """
+        return await self.model.agenerate_content(self._content_roles(user_query), simplify_output=True)
+
+    def stream(self, user_query):
+        """
+        Input: user_query: List[str] or str
+        Output: generator of text chunks; "".join(chunks) equals what run() returns
+        """
+        return self.model.stream_content(self._content_roles(user_query))
     
 
 
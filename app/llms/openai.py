@@ -4,7 +4,10 @@ from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage,ToolMessage
 from langchain_core.prompts import ChatPromptTemplate
 from typing import Dict, Any, List
+import time
 from .utils.tool_formatter import dict_to_pydantic_model
+from .utils.response_cache import ResponseCache
+from .utils.logger import LOGGER
 
 
 ####################################################################################################
@@ -14,11 +17,17 @@ from .utils.tool_formatter import dict_to_pydantic_model
 ####################################################################################################
 
 class LangchainOpenaiJsonEngine:
-    def __init__(self, model_name, sampleBaseModel, systemPromptText: str=None, humanPromptText: str=None, temperature: float=0.0):
+    def __init__(self, model_name, sampleBaseModel, systemPromptText: str=None, humanPromptText: str=None, temperature: float=0.0,
+                 response_cache: ResponseCache=None):
         self.llm = ChatOpenAI(model=model_name, temperature=temperature)
 
+        # Opt-in: identical (or, if the cache is semantic, similar) queries are answered from the cache
+        self.response_cache = response_cache
         if isinstance(sampleBaseModel, dict):
+            schema = sampleBaseModel
             sampleBaseModel = dict_to_pydantic_model(sampleBaseModel)
+        else:
+            schema = sampleBaseModel.schema()
 
         self.structured_llm = self.llm.with_structured_output(sampleBaseModel)
         
@@ -40,13 +49,88 @@ class LangchainOpenaiJsonEngine:
             [("system", self.systemPromptText), ("human", "Query:\n\n {query}")])
         
         self.micro_agent = self.prompt | self.structured_llm
+        self.cache_namespace = ResponseCache.namespace(model_name, self.systemPromptText, schema, temperature)
 
     def run(self, query: List[str]):
         query = "\n".join(query)
+        if self.response_cache is not None:
+            cached = self.response_cache.get(self.cache_namespace, query)
+            if cached is not None:
+                return cached
+
+        start = time.perf_counter()
         result = self.micro_agent.invoke({
             "query": query
         })
-        return [dict(result)]
+        response = [dict(result)]
+        if self.response_cache is not None:
+            self.response_cache.record_miss(time.perf_counter() - start)
+            self.response_cache.put(self.cache_namespace, query, response)
+        return response
+
+    def _batch_inputs(self, queries):
+        """
+        Returns (results, misses): results aligned with queries holding cache hits,
+        misses as [(index, joined query)] still to be sent to the model.
+        """
+        results = [None] * len(queries)
+        misses = []
+        for i, query in enumerate(queries):
+            query = query if isinstance(query, str) else "\n".join(query)
+            cached = self.response_cache.get(self.cache_namespace, query) if self.response_cache is not None else None
+            if cached is not None:
+                results[i] = cached[0]
+            else:
+                misses.append((i, query))
+        return results, misses
+
+    def _batch_outputs(self, results, misses, outputs, seconds):
+        for (i, query), output in zip(misses, outputs):
+            if isinstance(output, Exception):
+                results[i] = {"error": str(output)}
+                continue
+            results[i] = dict(output)
+            if self.response_cache is not None:
+                self.response_cache.record_miss(seconds)
+                self.response_cache.put(self.cache_namespace, query, [results[i]])
+        return results
+
+    def run_batch(self, queries: List, max_concurrency: int = 8):
+        """
+        Run many independent queries concurrently with the runnable's batch().
+        Each query is a string or a list of strings (joined like run()).
+        Returns one structured result per query, in order; a failed query yields
+        {"error": ...} without affecting the others.
+        """
+        results, misses = self._batch_inputs(queries)
+        if not misses:
+            return results
+        start = time.perf_counter()
+        outputs = self.micro_agent.batch(
+            [{"query": query} for _, query in misses],
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True
+        )
+        # Calls overlap, so the batch wall time stands in for each miss' latency
+        return self._batch_outputs(results, misses, outputs, time.perf_counter() - start)
+
+    async def arun_batch(self, queries: List, max_concurrency: int = 8):
+        """
+        Async version of run_batch using abatch().
+        """
+        results, misses = self._batch_inputs(queries)
+        if not misses:
+            return results
+        start = time.perf_counter()
+        outputs = await self.micro_agent.abatch(
+            [{"query": query} for _, query in misses],
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True
+        )
+        return self._batch_outputs(results, misses, outputs, time.perf_counter() - start)
+
+    def cache_stats(self):
+        return self.response_cache.stats() if self.response_cache is not None else None
 
 
 ####################################################################################################
@@ -88,8 +172,40 @@ class LangchainOpenaiSimpleChatEngine:
             return level1_result.content
         else:
             print("Running tools ...")
-            for tool_call in level1_result.tool_calls:
-                tool_output = tool_call.invoke()
-                messages.append(ToolMessage(tool_output, tool_call_id=tool_call["id"]))
+            self._run_tool_calls(messages, level1_result)
             level2_result = self.llm_with_tools.invoke(messages)
-            return level2_result.content
\ No newline at end of file
+            return level2_result.content
+
+    def _run_tool_calls(self, messages, ai_message):
+        """Append the model's tool-call message and one ToolMessage per call to messages."""
+        tools_by_name = {t.name: t for t in self.tools}
+        messages.append(ai_message)
+        for tool_call in ai_message.tool_calls:
+            tool_output = tools_by_name[tool_call["name"]].invoke(tool_call["args"])
+            messages.append(ToolMessage(str(tool_output), tool_call_id=tool_call["id"]))
+
+    def stream(self, query: List[str]):
+        """
+        Same as run, but yields text chunks as the model produces them.
+        If the model calls tools, the tools run once the first response is complete
+        and the follow-up answer is streamed.
+        """
+        query = "\n".join(query)
+
+        messages = [
+            SystemMessage(self.systemPromptText),
+            HumanMessage(content=query)
+        ]
+        level1_result = None
+        for chunk in self.llm_with_tools.stream(messages):
+            level1_result = chunk if level1_result is None else level1_result + chunk
+            if chunk.content:
+                yield chunk.content
+
+        if level1_result is None or len(level1_result.tool_calls) == 0:
+            return
+        LOGGER.debug(f"Running {len(level1_result.tool_calls)} tool call(s) before streaming the answer")
+        self._run_tool_calls(messages, level1_result)
+        for chunk in self.llm_with_tools.stream(messages):
+            if chunk.content:
+                yield chunk.content
\ No newline at end of file
@@ -0,0 +1,118 @@
+import os
+import time
+import threading
+from collections import deque
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class HttpClient:
+    """
+    Shared outbound HTTP client: one pooled requests.Session with keep-alive,
+    per-host connection pools, default connect/read timeouts, retry with
+    exponential backoff for connection errors and idempotent 5xx responses,
+    and per-host latency metrics.
+    Usage:
+        response = HTTP_CLIENT.get("https://api.open-meteo.com/v1/forecast", params={...})
+        HTTP_CLIENT.metrics()
+    """
+
+    def __init__(self, connect_timeout=5.0, read_timeout=30.0, pool_connections=16, pool_maxsize=16,
+                 max_retries=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504)):
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = status_forcelist
+
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter(pool_maxsize))
+        self.session.mount("http://", self._adapter(pool_maxsize))
+
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _adapter(self, pool_maxsize):
+        # Connect errors are retried for every method; read errors and 5xx only for idempotent ones
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=self.status_forcelist,
+            allowed_methods=frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}),
+            raise_on_status=False,
+            respect_retry_after_header=True,
+        )
+        return HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    def limit_host(self, base_url, pool_maxsize):
+        """
+        Give one host its own pool size, e.g. limit_host("https://api.open-meteo.com", 4).
+        """
+        self.session.mount(base_url.rstrip("/") + "/", self._adapter(pool_maxsize))
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        error = False
+        try:
+            response = self.session.request(method, url, **kwargs)
+            error = response.status_code >= 500
+            return response
+        except requests.exceptions.RequestException:
+            error = True
+            raise
+        finally:
+            self._record(host, time.perf_counter() - start, error)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def _record(self, host, seconds, error):
+        with self._lock:
+            metrics = self._metrics.get(host)
+            if metrics is None:
+                metrics = self._metrics[host] = {
+                    "requests": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+                    "recent": deque(maxlen=1000)
+                }
+            metrics["requests"] += 1
+            metrics["errors"] += int(error)
+            metrics["total_seconds"] += seconds
+            metrics["max_seconds"] = max(metrics["max_seconds"], seconds)
+            metrics["recent"].append(seconds)
+
+    def metrics(self):
+        """
+        Per-host request counts, error counts and latency (mean/max overall, p50/p95 over the last 1000 calls).
+        """
+        with self._lock:
+            report = {}
+            for host, metrics in self._metrics.items():
+                recent = sorted(metrics["recent"])
+                report[host] = {
+                    "requests": metrics["requests"],
+                    "errors": metrics["errors"],
+                    "mean_seconds": metrics["total_seconds"] / metrics["requests"],
+                    "max_seconds": metrics["max_seconds"],
+                    "p50_seconds": recent[len(recent) // 2],
+                    "p95_seconds": recent[min(len(recent) - 1, int(len(recent) * 0.95))],
+                }
+            return report
+
+
+HTTP_CLIENT = HttpClient(
+    connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+    read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", "30")),
+    pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", "16")),
+    max_retries=int(os.getenv("HTTP_MAX_RETRIES", "3")),
+)
@@ -0,0 +1,132 @@
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_minute`.
+    `reserve` deducts immediately (the balance may go negative) and returns how long
+    the caller must wait, so sync and async callers can share one bucket.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # A single request larger than the bucket waits for a full bucket instead of forever
+            self._tokens -= min(tokens, self.capacity)
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute buckets plus a cap on in-flight requests.
+    Usage:
+        limiter = RateLimiter(rpm=60, tpm=100000, max_concurrency=4)
+        with limiter.limit(tokens=500):
+            ...
+        async with limiter.alimit(tokens=500):
+            ...
+    """
+
+    def __init__(self, rpm: float = None, tpm: float = None, max_concurrency: int = None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._lock = threading.Lock()
+        self._metrics = {"requests": 0, "throttled_seconds": 0.0}
+
+    def _reserve(self, tokens):
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.reserve(tokens))
+        with self._lock:
+            self._metrics["requests"] += 1
+            self._metrics["throttled_seconds"] += delay
+        return delay
+
+    def limit(self, tokens: float = 1.0):
+        return _SyncSlot(self, tokens)
+
+    def alimit(self, tokens: float = 1.0):
+        return _AsyncSlot(self, tokens)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._metrics)
+
+
+class _SyncSlot:
+    def __init__(self, limiter, tokens):
+        self.limiter = limiter
+        self.tokens = tokens
+
+    def __enter__(self):
+        delay = self.limiter._reserve(self.tokens)
+        if delay:
+            time.sleep(delay)
+        if self.limiter._slots is not None:
+            self.limiter._slots.acquire()
+
+    def __exit__(self, *exc):
+        if self.limiter._slots is not None:
+            self.limiter._slots.release()
+
+
+class _AsyncSlot:
+    def __init__(self, limiter, tokens):
+        self.limiter = limiter
+        self.tokens = tokens
+
+    async def __aenter__(self):
+        delay = self.limiter._reserve(self.tokens)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.limiter._slots is not None:
+            # The semaphore is shared with sync callers, so poll instead of blocking the event loop
+            while not self.limiter._slots.acquire(blocking=False):
+                await asyncio.sleep(0.01)
+
+    async def __aexit__(self, *exc):
+        if self.limiter._slots is not None:
+            self.limiter._slots.release()
+
+
+def retry_after_seconds(headers):
+    """
+    Parses a Retry-After header (delta seconds or HTTP date); None if absent or invalid.
+    """
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0, retry_after: float = None):
+    """
+    Exponential backoff with full jitter; a server-provided Retry-After takes precedence.
+    """
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(cap, base * 2 ** attempt))
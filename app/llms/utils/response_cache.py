@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class ResponseCache:
+    """
+    Opt-in cache for structured LLM responses.
+    Entries are namespaced by (model, system prompt, schema, temperature) and keyed by the
+    normalized query. Lookups try an exact match first; if an `embedder` and a
+    `similarity_threshold` are given, a miss falls back to the most similar cached query
+    of the same namespace whose cosine similarity is at least the threshold.
+    An in-process LRU sits in front of an optional SQLite store; entries expire after `ttl` seconds.
+    Both tiers hold the serialized JSON, so every get returns a fresh copy the caller may modify.
+    Usage:
+        cache = ResponseCache("tmp/llm_cache.sqlite", ttl=86400)
+        namespace = cache.namespace("gpt-4o-mini", system_prompt, schema, 0.2)
+        cache.get(namespace, query) or cache.put(namespace, query, response)
+    """
+
+    def __init__(self, path: str = None, ttl: float = 86400, max_memory_items: int = 1000, max_disk_items: int = 100000,
+                 embedder=None, similarity_threshold: float = None):
+        self.ttl = ttl
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold if embedder is not None else None
+        self._memory = OrderedDict()
+        self._semantic = {}  # namespace -> {"keys": [...], "vectors": [...]}
+        self._lock = threading.Lock()
+        self._metrics = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "miss_seconds": 0.0}
+
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, response TEXT NOT NULL, "
+                "embedding BLOB, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_namespace ON responses(namespace)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+            self._conn.commit()
+
+    @staticmethod
+    def namespace(model, system_prompt, schema, temperature) -> str:
+        schema_hash = hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        raw = json.dumps([model, system_prompt, schema_hash, temperature], default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    @staticmethod
+    def normalize(query) -> str:
+        if isinstance(query, list):
+            query = "\n".join(query)
+        return " ".join(query.split()).casefold()
+
+    def _key(self, namespace, query):
+        return f"{namespace}:{hashlib.sha256(query.encode('utf-8')).hexdigest()}"
+
+    def _remember(self, key, response, expires_at):
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            evicted, _ = self._memory.popitem(last=False)
+            if self._conn is None:
+                # Without a disk tier the entry is gone for good
+                self._forget(evicted)
+
+    def _forget(self, key):
+        """Drop a dead key from its namespace's semantic index."""
+        index = self._semantic.get(key.split(":", 1)[0])
+        if index is not None and key in index["keys"]:
+            position = index["keys"].index(key)
+            del index["keys"][position]
+            del index["vectors"][position]
+
+    def _lookup(self, key, now):
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[1] > now:
+                self._memory.move_to_end(key)
+                return json.loads(entry[0])
+            del self._memory[key]
+            self._forget(key)
+        if self._conn is not None:
+            row = self._conn.execute("SELECT response, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] > now:
+                self._remember(key, row[0], row[1])
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                return json.loads(row[0])
+        return None
+
+    def _semantic_index(self, namespace, now):
+        index = self._semantic.get(namespace)
+        if index is None:
+            index = self._semantic[namespace] = {"keys": [], "vectors": []}
+            if self._conn is not None:
+                rows = self._conn.execute(
+                    "SELECT key, embedding FROM responses WHERE namespace = ? AND embedding IS NOT NULL AND expires_at > ?",
+                    (namespace, now)
+                ).fetchall()
+                for key, blob in rows:
+                    index["keys"].append(key)
+                    index["vectors"].append(np.frombuffer(blob, dtype=np.float32))
+        return index
+
+    def _embed(self, query):
+        vector = np.asarray(self.embedder([query])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, namespace, query):
+        """
+        Returns the cached response for the query, or None on a miss.
+        """
+        query = self.normalize(query)
+        key = self._key(namespace, query)
+        now = time.time()
+        with self._lock:
+            response = self._lookup(key, now)
+            if response is not None:
+                self._metrics["exact_hits"] += 1
+                return response
+            if self.similarity_threshold is None:
+                self._metrics["misses"] += 1
+                return None
+
+        # Embedding happens outside the lock; it is a network call on a cold embedding cache
+        vector = self._embed(query)
+        with self._lock:
+            index = self._semantic_index(namespace, now)
+            if index["vectors"]:
+                scores = np.stack(index["vectors"]) @ vector
+                # Best first; a match whose entry expired or was evicted falls through to the next
+                candidates = [index["keys"][i] for i in np.argsort(-scores) if scores[i] >= self.similarity_threshold]
+                for candidate in candidates:
+                    response = self._lookup(candidate, now)
+                    if response is not None:
+                        self._metrics["semantic_hits"] += 1
+                        return response
+                    self._forget(candidate)
+            self._metrics["misses"] += 1
+            return None
+
+    def put(self, namespace, query, response):
+        query = self.normalize(query)
+        key = self._key(namespace, query)
+        now = time.time()
+        expires_at = now + self.ttl
+        serialized = json.dumps(response, default=str)
+        vector = self._embed(query) if self.similarity_threshold is not None else None
+        with self._lock:
+            self._remember(key, serialized, expires_at)
+            if vector is not None:
+                index = self._semantic_index(namespace, now)
+                if key not in index["keys"]:
+                    index["keys"].append(key)
+                    index["vectors"].append(vector)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, namespace, response, embedding, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, namespace, serialized,
+                     vector.tobytes() if vector is not None else None, expires_at, now)
+                )
+                self._evict(now)
+                self._conn.commit()
+
+    def _evict(self, now):
+        """Drop expired rows, then least recently used rows beyond max_disk_items."""
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_disk_items:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                (count - self.max_disk_items,)
+            )
+            # Rebuild semantic indexes lazily so they do not point at evicted rows
+            self._semantic.clear()
+
+    def record_miss(self, seconds):
+        """Engines report how long an uncached call took, to estimate the time saved by hits."""
+        with self._lock:
+            self._metrics["miss_seconds"] += seconds
+
+    def stats(self):
+        with self._lock:
+            hits = self._metrics["exact_hits"] + self._metrics["semantic_hits"]
+            misses = self._metrics["misses"]
+            avg_miss_seconds = self._metrics["miss_seconds"] / misses if misses else 0.0
+            return {
+                "exact_hits": self._metrics["exact_hits"],
+                "semantic_hits": self._metrics["semantic_hits"],
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "avg_miss_seconds": avg_miss_seconds,
+                "estimated_seconds_saved": hits * avg_miss_seconds,
+                "memory_items": len(self._memory),
+            }
+
+
+_DEFAULT_CACHE = None
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def default_response_cache():
+    """
+    Process-wide cache configured from the environment:
+    LLM_RESPONSE_CACHE_PATH (default tmp/llm_response_cache.sqlite, empty for memory only),
+    LLM_RESPONSE_CACHE_TTL_SECONDS (default 86400) and LLM_RESPONSE_CACHE_SIMILARITY
+    (cosine threshold for semantic hits via the OpenAI embedder; unset disables them).
+    """
+    global _DEFAULT_CACHE
+    with _DEFAULT_CACHE_LOCK:
+        if _DEFAULT_CACHE is None:
+            similarity = os.getenv("LLM_RESPONSE_CACHE_SIMILARITY")
+            embedder = None
+            if similarity:
+                from app.vector_store.models.openai_emb import OPENAI_EMBEDDER
+                embedder = OPENAI_EMBEDDER
+            _DEFAULT_CACHE = ResponseCache(
+                path=os.getenv("LLM_RESPONSE_CACHE_PATH", "tmp/llm_response_cache.sqlite") or None,
+                ttl=float(os.getenv("LLM_RESPONSE_CACHE_TTL_SECONDS", "86400")),
+                embedder=embedder,
+                similarity_threshold=float(similarity) if similarity else None
+            )
+        return _DEFAULT_CACHE
@@ -1,7 +1,6 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel
 from app.vector_store.models.openai_emb import OPENAI_EMBEDDER
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+from app.mongo.vector_index import MongoVectorIndex
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -10,11 +9,19 @@ load_dotenv()
 
 
 class BaseMongoHandler:
+    # Embedding fields written by add_item; excluded from reads unless explicitly requested
+    EMBEDDING_FIELDS = ("vector",)
+    # Indexes this handler relies on: [{"keys": [(field, direction), ...], **create_index options}]
+    INDEXES = []
+    # Representative filters of the handler's hot queries, checked by check_query_plans()
+    QUERY_SHAPES = []
+
     def __init__(self, collection_name):
         self.client = MongoClient(os.environ['MONGO_DB_URI'])
         self.db_name = "fsq_db"
         self.db = self.client[self.db_name]
         self.collection = self.db[collection_name]
+        self._vector_indexes = {}
 
     def add_item(self, item, unique_field, vector_fields=None):
         """
@@ -36,25 +43,68 @@ class BaseMongoHandler:
         self.collection.insert_one(item)
         return item
 
-    def get_by_id(self, unique_field, value):
-        return self.collection.find_one({unique_field: value})
+    def _projection(self, projection=None, exclude_vectors=True):
+        """
+        Resolve the projection for a read. An explicit projection wins; otherwise
+        embedding fields are excluded unless exclude_vectors is False.
+        """
+        if projection is not None:
+            return projection
+        if exclude_vectors:
+            return {field: 0 for field in self.EMBEDDING_FIELDS}
+        return None
+
+    @staticmethod
+    def _serialize_id(item):
+        """
+        Convert the ObjectId of a fetched item to a string so it can be returned as JSON.
+        """
+        if item is not None and "_id" in item:
+            item["_id"] = str(item["_id"])
+        return item
+
+    def get_by_id(self, unique_field, value, projection=None, exclude_vectors=True, serialize_ids=False):
+        item = self.collection.find_one({unique_field: value}, self._projection(projection, exclude_vectors))
+        return self._serialize_id(item) if serialize_ids else item
 
-    def get_all(self):
-        return list(self.collection.find())
+    def get_all(self, projection=None, exclude_vectors=True, serialize_ids=False):
+        return self.get_by_query({}, projection, exclude_vectors, serialize_ids)
     
-    def get_by_query(self, query):
+    def get_by_query(self, query, projection=None, exclude_vectors=True, serialize_ids=False):
         """
         Retrieves items from the collection based on a query.
         
         Args:
             query (dict): The query to filter items.
+            projection (dict): Optional fields to include/exclude, e.g. {"name": 1}.
+            exclude_vectors (bool): Drop embedding fields when no projection is given.
+            serialize_ids (bool): Return `_id` as a string, ready for jsonify.
         Example:
             query = {"field_name": "value"}
         
         Returns:
             list: List of items matching the query.
         """
-        return list(self.collection.find(query))
+        items = list(self.collection.find(query, self._projection(projection, exclude_vectors)))
+        return [self._serialize_id(item) for item in items] if serialize_ids else items
+
+    def iter_by_query(self, query, projection=None, exclude_vectors=True, batch_size=500):
+        """
+        Streams items matching a query in lists of up to batch_size documents,
+        instead of materialising the whole result set.
+
+        Yields:
+            list: The next batch of items.
+        """
+        cursor = self.collection.find(query, self._projection(projection, exclude_vectors)).batch_size(batch_size)
+        batch = []
+        for item in cursor:
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
     
     def update_by_id(self, unique_field, value, update_fields):
         """
@@ -96,14 +146,73 @@ class BaseMongoHandler:
         result = self.collection.delete_many({})
         return result.deleted_count > 0
 
-    def search(self, query, vector_field='vector', similarity_threshold=0.5):
+    def ensure_indexes(self):
+        """
+        Creates the indexes declared in INDEXES. Idempotent: existing indexes are left untouched.
+
+        Returns:
+            list: Names of the declared indexes.
+        """
+        if not self.INDEXES:
+            return []
+        index_models = [
+            IndexModel(spec["keys"], **{k: v for k, v in spec.items() if k != "keys"})
+            for spec in self.INDEXES
+        ]
+        return self.collection.create_indexes(index_models)
+
+    def check_query_plans(self):
+        """
+        Explains every filter in QUERY_SHAPES and reports those whose winning plan is a COLLSCAN.
+
+        Returns:
+            list: The filters that still scan the whole collection.
+        """
+        return self._find_collscans(self.collection, self.QUERY_SHAPES)
+
+    @staticmethod
+    def _find_collscans(collection, queries):
+        def has_collscan(plan):
+            if isinstance(plan, dict):
+                return plan.get("stage") == "COLLSCAN" or any(has_collscan(v) for v in plan.values())
+            if isinstance(plan, list):
+                return any(has_collscan(v) for v in plan)
+            return False
+
+        collscans = []
+        for query in queries:
+            plan = collection.find(query).explain().get("queryPlanner", {}).get("winningPlan", {})
+            if has_collscan(plan):
+                collscans.append(query)
+        return collscans
+
+    def _get_vector_index(self, vector_field):
+        # Built lazily: only collections that are actually searched pay for the index
+        if vector_field not in self._vector_indexes:
+            self._vector_indexes[vector_field] = MongoVectorIndex(
+                self.collection,
+                vector_field=vector_field,
+                atlas_index_name=os.getenv("MONGO_VECTOR_SEARCH_INDEX"),
+                atlas_max_results=int(os.getenv("MONGO_VECTOR_SEARCH_MAX_RESULTS", "100"))
+            )
+        return self._vector_indexes[vector_field]
+
+    def search(self, query, vector_field='vector', similarity_threshold=0.5, top_k=None, projection=None, exclude_vectors=True):
+        """
+        Semantic search over items stored with `add_item(..., vector_fields=...)`.
+        Candidates come from the collection's vector index; only the matching documents are fetched.
+
+        Returns:
+            list: Items with similarity above the threshold, most similar first (at most top_k;
+            with an Atlas index and top_k=None, at most MONGO_VECTOR_SEARCH_MAX_RESULTS).
+        """
         query_vector = OPENAI_EMBEDDER(query)
-        items = self.collection.find()
-        results = []
-        for item in items:
-            if vector_field in item:
-                item_vector = np.array(item[vector_field]).reshape(1, -1)
-                similarity = cosine_similarity(query_vector.reshape(1, -1), item_vector)[0][0]
-                results.append((item, similarity))
-        results.sort(key=lambda x: x[1], reverse=True)
-        return [item for item, sim in results if sim > similarity_threshold]
\ No newline at end of file
+        matches = self._get_vector_index(vector_field).search(
+            query_vector, top_k=top_k, similarity_threshold=similarity_threshold
+        )
+        ids = [doc_id for doc_id, _ in matches]
+        items = {
+            item["_id"]: item
+            for item in self.collection.find({"_id": {"$in": ids}}, self._projection(projection, exclude_vectors))
+        }
+        return [items[doc_id] for doc_id in ids if doc_id in items]
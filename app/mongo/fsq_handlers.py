@@ -1,13 +1,29 @@
-from random import sample
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import ReplaceOne, UpdateOne, IndexModel, ASCENDING
+from pymongo.errors import CollectionInvalid, ConnectionFailure, DuplicateKeyError, PyMongoError
 from app.mongo.base_handler import BaseMongoHandler
+from app.service.health_stats import BUCKET_SIZES, METRICS, bucket_stats
 from app.service.taste_analysis import TasteAnalyzer
-from app.service.geo import get_temperature
+from app.service.geo import get_temperature, prefetch_temperatures_for_points
 import os
-from collections import defaultdict
+import time
+import uuid
+import threading
 import numpy as np
 
 
 class UserHandler(BaseMongoHandler):
+    INDEXES = [
+        {"keys": [("user_id", ASCENDING)], "unique": True},
+    ]
+    QUERY_SHAPES = [
+        {"user_id": ""},
+    ]
+
+    # Fields returned by the user details endpoint
+    DETAILS_PROJECTION = {"user_id": 1, "name": 1, "email": 1, "phone": 1, "taste_groups": 1}
+
     def __init__(self):
         super().__init__('users')
         self.taste_analyzer = TasteAnalyzer()
@@ -25,10 +41,7 @@ class UserHandler(BaseMongoHandler):
         user_data['taste_groups'] = {}
 
         # if same user_id exists, then replace
-        existing_user = self.collection.find_one({"user_id": user_data["user_id"]})
-        if existing_user:
-            self.collection.delete_one({"user_id": user_data["user_id"]})
-        response = self.collection.insert_one(user_data)
+        response = self.collection.replace_one({"user_id": user_data["user_id"]}, user_data, upsert=True)
         return response
     
     def add_taste_group(self, user_id, taste_text):
@@ -37,7 +50,7 @@ class UserHandler(BaseMongoHandler):
         taste_text: A descriptive text about the user's travel preferences.
         """
         # Sanity check (user_id exists and taste_text is non-empty and tmp/images/user_id/ has images)
-        user = self.collection.find_one({"user_id": user_id})
+        user = self.collection.find_one({"user_id": user_id}, {"_id": 1})
         if not user:
             return {"error": "User not found."}
         if not taste_text or not taste_text.strip():
@@ -66,6 +79,19 @@ class UserHandler(BaseMongoHandler):
 
 
 class TripHandler(BaseMongoHandler):
+    INDEXES = [
+        {"keys": [("trip_id", ASCENDING)], "unique": True},
+        {"keys": [("user_ids", ASCENDING)]},  # multikey
+    ]
+    QUERY_SHAPES = [
+        {"trip_id": ""},
+        {"user_ids": ""},
+    ]
+    # Fields returned when listing a user's trips
+    LIST_PROJECTION = {
+        "trip_id": 1, "trip_name": 1, "trip_image": 1, "user_ids": 1, "pending_invites": 1, "context": 1, "metadata": 1
+    }
+
     def __init__(self):
         super().__init__('trips')
 
@@ -89,80 +115,76 @@ class TripHandler(BaseMongoHandler):
         """
         trip_data["pending_invites"] = []
         # if same trip_id exists, then replace
-        existing_trip = self.collection.find_one({"trip_id": trip_data["trip_id"]})
-        if existing_trip:
-            self.collection.delete_one({"trip_id": trip_data["trip_id"]})
-        response = self.collection.insert_one(trip_data)
+        response = self.collection.replace_one({"trip_id": trip_data["trip_id"]}, trip_data, upsert=True)
         return response
     
     def add_invite(self, trip_id, user_id):
         """
-        Add a user to the pending invites of a trip after checking if they are already invited.
+        Add a user to the pending invites of a trip unless they are already invited or a member.
+        The checks are part of the update filter, so concurrent invites cannot race.
         """
-        trip = self.collection.find_one({"trip_id": trip_id})
+        result = self.collection.update_one(
+            {"trip_id": trip_id, "pending_invites": {"$ne": user_id}, "user_ids": {"$ne": user_id}},
+            {"$addToSet": {"pending_invites": user_id}}
+        )
+        if result.matched_count:
+            return {"message": "User invited successfully"}
+
+        # Nothing matched: read the trip once to report why
+        trip = self.collection.find_one({"trip_id": trip_id}, {"user_ids": 1, "pending_invites": 1})
         if not trip:
             return {"error": "Trip not found"}
 
         if user_id in trip.get("pending_invites", []):
             return {"message": "User already invited"}
         
-        if user_id in trip.get("user_ids", []):
-            return {"message": "User already part of the trip"}
+        return {"message": "User already part of the trip"}
 
-        self.collection.update_one(
-            {"trip_id": trip_id},
-            {"$push": {"pending_invites": user_id}}
-        )
-        return {"message": "User invited successfully"}
-    
-    def approve_invite(self, trip_id, approver_id, invitee_id):
+    def _invite_error(self, trip_id, approver_id, invitee_id):
         """
-        Approve a trip invite by moving the user from pending_invites to user_ids.
+        Explain why a conditional invite update matched no trip.
         """
-        trip = self.collection.find_one({"trip_id": trip_id})
+        trip = self.collection.find_one({"trip_id": trip_id}, {"user_ids": 1, "pending_invites": 1})
         if not trip:
             return {"error": "Trip not found"}
 
         if approver_id not in trip.get("user_ids", []):
             return {"error": "Approver is not part of the trip"}
 
-        if invitee_id not in trip.get("pending_invites", []):
-            return {"error": "Invitee not in pending invites"}
-
-        self.collection.update_one(
-            {"trip_id": trip_id},
+        return {"error": "Invitee not in pending invites"}
+    
+    def approve_invite(self, trip_id, approver_id, invitee_id):
+        """
+        Approve a trip invite by moving the user from pending_invites to user_ids.
+        """
+        result = self.collection.update_one(
+            {"trip_id": trip_id, "user_ids": approver_id, "pending_invites": invitee_id},
             {
                 "$pull": {"pending_invites": invitee_id},
-                "$push": {"user_ids": invitee_id}
+                "$addToSet": {"user_ids": invitee_id}
             }
         )
+        if not result.matched_count:
+            return self._invite_error(trip_id, approver_id, invitee_id)
         return {"message": "Invite approved successfully"}
     
     def deny_invite(self, trip_id, approver_id, invitee_id):
         """
         Deny a trip invite by removing the user from pending_invites.
         """
-        trip = self.collection.find_one({"trip_id": trip_id})
-        if not trip:
-            return {"error": "Trip not found"}
-
-        if approver_id not in trip.get("user_ids", []):
-            return {"error": "Approver is not part of the trip"}
-
-        if invitee_id not in trip.get("pending_invites", []):
-            return {"error": "Invitee not in pending invites"}
-
-        self.collection.update_one(
-            {"trip_id": trip_id},
+        result = self.collection.update_one(
+            {"trip_id": trip_id, "user_ids": approver_id, "pending_invites": invitee_id},
             {"$pull": {"pending_invites": invitee_id}}
         )
+        if not result.matched_count:
+            return self._invite_error(trip_id, approver_id, invitee_id)
         return {"message": "Invite denied successfully"}
 
     def view_invites(self, trip_id, user_id):
         """
         View all pending invites for a trip.
         """
-        trip = self.collection.find_one({"trip_id": trip_id})
+        trip = self.collection.find_one({"trip_id": trip_id}, {"user_ids": 1, "pending_invites": 1})
         if not trip:
             return {"error": "Trip not found"}
 
@@ -175,7 +197,7 @@ class TripHandler(BaseMongoHandler):
         """
         View all members of a trip.
         """
-        trip = self.collection.find_one({"trip_id": trip_id})
+        trip = self.collection.find_one({"trip_id": trip_id}, {"user_ids": 1})
         if not trip:
             return {"error": "Trip not found"}
 
@@ -184,18 +206,515 @@ class TripHandler(BaseMongoHandler):
 
         return {"members": trip.get("user_ids", [])}
     
-    def get_all_trips_for_user(self, user_id):
+    def get_all_trips_for_user(self, user_id, projection=None, serialize_ids=False):
         """
         Get all trips for a user.
         Fetch those trips where user_id is present in user_ids.
         """
-        trips = list(self.collection.find({"user_ids": user_id}))
+        trips = self.get_by_query({"user_ids": user_id}, projection=projection, serialize_ids=serialize_ids)
         return trips
 
 
+class HealthProfileHandler(BaseMongoHandler):
+    """
+    Materialized per-user health profile: count/sum/sum of squares/min/max of every metric
+    per factor bucket, maintained incrementally as points are synced so the stats are
+    read from one small document.
+    Writers hold a per-user lease (lease_token/lease_until) so only one sync updates a profile
+    at a time; "syncing" stays set while a sync is in progress, so a profile left behind by a
+    crashed sync is rebuilt instead of trusted.
+    Profile format:
+    {
+        "user_id": "user-1",
+        "built": True,
+        "syncing": False,
+        "buckets": {
+            "temperature": {
+                "20": {"heart_rate": {"count": 3, "sum": 240.0, "sumsq": 19250.0, "min": 72, "max": 90}, ...}
+            },
+            ...
+        }
+    }
+    """
+    INDEXES = [
+        {"keys": [("user_id", ASCENDING)], "unique": True},
+    ]
+    QUERY_SHAPES = [
+        {"user_id": ""},
+        {"user_id": "", "lease_token": ""},
+    ]
+
+    def __init__(self, bucket_sizes, metrics, lease_seconds=300):
+        super().__init__(collection_name="health_profiles")
+        self.bucket_sizes = bucket_sizes
+        self.metrics = metrics
+        self.lease_seconds = lease_seconds
+        self._indexes_ready = False
+        self._indexes_lock = threading.Lock()
+
+    def _ensure_unique_index(self):
+        """
+        The lease relies on the unique user_id index, so it is created here before the first
+        acquire rather than trusting startup provisioning (which MONGO_ENSURE_INDEXES=false skips).
+        If it cannot be created, acquire raises instead of handing out leases without it.
+        """
+        if not self._indexes_ready:
+            with self._indexes_lock:
+                if not self._indexes_ready:
+                    self.ensure_indexes()
+                    self._indexes_ready = True
+
+    def acquire(self, user_id):
+        """
+        Take the user's lease, creating the profile document if needed.
+        Returns the lease token, or None if another worker holds an unexpired lease
+        (the unique user_id index turns the competing upsert into a DuplicateKeyError).
+        """
+        self._ensure_unique_index()
+        token = uuid.uuid4().hex
+        now = time.time()
+        try:
+            self.collection.update_one(
+                {"user_id": user_id, "$or": [{"lease_until": {"$exists": False}}, {"lease_until": {"$lt": now}}]},
+                {"$set": {"lease_token": token, "lease_until": now + self.lease_seconds}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return None
+        return token
+
+    def renew(self, user_id, token):
+        """
+        Extend the lease; raises if it expired and was taken over by another worker.
+        """
+        self._update(user_id, token, {"$set": {"lease_until": time.time() + self.lease_seconds}})
+
+    def release(self, user_id, token):
+        self.collection.update_one(
+            {"user_id": user_id, "lease_token": token},
+            {"$unset": {"lease_token": "", "lease_until": ""}}
+        )
+
+    def needs_rebuild(self, user_id):
+        """
+        True if the profile was never built or a sync did not finish.
+        """
+        profile = self.collection.find_one({"user_id": user_id}, {"_id": 0, "built": 1, "syncing": 1})
+        return profile is None or not profile.get("built") or bool(profile.get("syncing"))
+
+    def begin(self, user_id, token):
+        self._update(user_id, token, {"$set": {"syncing": True}})
+
+    def finish(self, user_id, token):
+        self._update(user_id, token, {"$set": {"syncing": False}})
+
+    def invalidate(self, user_id):
+        """
+        Make the next sync rebuild the profile from scratch.
+        """
+        self.collection.update_one({"user_id": user_id}, {"$set": {"built": False}})
+
+    def apply_readings(self, user_id, token, readings):
+        """
+        Fold one user's readings (dicts with the factor and metric values) into their
+        profile with one $inc/$min/$max update.
+        """
+        update = {"$inc": {}, "$min": {}, "$max": {}}
+        for reading in readings:
+            for factor, bucket_size in self.bucket_sizes.items():
+                if reading[factor] is None:
+                    continue
+                bucket = int(np.floor(reading[factor] / bucket_size) * bucket_size)
+                for metric in self.metrics:
+                    value = reading[metric]
+                    if value is None:
+                        continue
+                    path = f"buckets.{factor}.{bucket}.{metric}"
+                    update["$inc"][f"{path}.count"] = update["$inc"].get(f"{path}.count", 0) + 1
+                    update["$inc"][f"{path}.sum"] = update["$inc"].get(f"{path}.sum", 0.0) + value
+                    update["$inc"][f"{path}.sumsq"] = update["$inc"].get(f"{path}.sumsq", 0.0) + value * value
+                    update["$min"][f"{path}.min"] = min(update["$min"].get(f"{path}.min", value), value)
+                    update["$max"][f"{path}.max"] = max(update["$max"].get(f"{path}.max", value), value)
+        if update["$inc"]:
+            self._update(user_id, token, update)
+
+    def replace_buckets(self, user_id, token, buckets):
+        """
+        Swap in a freshly computed profile in one update and mark it built.
+        """
+        self._update(user_id, token, {"$set": {"buckets": buckets, "built": True, "syncing": False}})
+
+    def _update(self, user_id, token, update):
+        # Every write is conditional on the lease, so a worker that lost it cannot touch the profile
+        if not self.collection.update_one({"user_id": user_id, "lease_token": token}, update).matched_count:
+            raise RuntimeError(f"Lost the health profile lease for user {user_id}")
+
+    def get_stats(self, user_id):
+        """
+        Returns the profile in the analyze_health_data format, or None if the user has no profile.
+        """
+        profile = self.collection.find_one({"user_id": user_id}, {"_id": 0, "buckets": 1})
+        if profile is None:
+            return None
+        results = {}
+        for factor in self.bucket_sizes:
+            results[factor] = {}
+            for bucket, metrics in profile.get("buckets", {}).get(factor, {}).items():
+                results[factor][int(bucket)] = {
+                    f"{metric}_stats": self._stats(metrics[metric]) if metric in metrics else None
+                    for metric in self.metrics
+                }
+        return results
+
+    @staticmethod
+    def _stats(accumulator):
+        count = accumulator["count"]
+        mean = accumulator["sum"] / count
+        return {
+            "mean": mean,
+            "max": float(accumulator["max"]),
+            "min": float(accumulator["min"]),
+            "var": max(accumulator["sumsq"] / count - mean * mean, 0.0)
+        }
+
+
 class HealthDataHandler(BaseMongoHandler):
-    def __init__(self):
+    INDEXES = [
+        {"keys": [("user_id", ASCENDING), ("point_id", ASCENDING)], "unique": True},
+        {"keys": [("user_id", ASCENDING), ("trip_id", ASCENDING), ("timestamp", ASCENDING)]},
+        {"keys": [("user_id", ASCENDING), ("synced", ASCENDING)]},
+    ]
+    QUERY_SHAPES = [
+        {"user_id": "", "point_id": ""},
+        {"user_id": "", "trip_id": ""},
+        {"user_id": ""},
+        {"user_id": "", "synced": {"$ne": True}},
+        {"user_id": "", "synced": True, "timestamp": {"$gte": "", "$lte": "~"}},
+    ]
+    # Indexes and hot queries of the time-series readings collection (see INDEXES/QUERY_SHAPES)
+    READINGS_INDEXES = [
+        {"keys": [("meta.user_id", ASCENDING), ("recorded_at", ASCENDING)]},
+    ]
+    READINGS_QUERY_SHAPES = [
+        {"meta.user_id": "", "recorded_at": {"$gte": datetime.min, "$lte": datetime.max}},
+    ]
+
+    # Defined in app.service.health_stats so the stats engine can be used without Mongo
+    BUCKET_SIZES = BUCKET_SIZES
+    METRICS = METRICS
+    # Bookkeeping written next to each point by sync_user; hidden from get_health_data
+    SYNC_FIELDS = ("synced", "ingest_id", "replaced", "reading")
+
+    def __init__(self, profile_handler=None):
         super().__init__(collection_name="health_data")
+        # health_data keeps one document per point for CRUD; readings_collection is a
+        # time-series copy with derived factors that the analysis aggregates over. It is
+        # resolved on first use, so importing the handlers does not talk to Mongo
+        self._readings_collection = None
+        self._readings_resolved = False
+        self._readings_lock = threading.Lock()
+        self.profile_handler = profile_handler
+        # Readings and profile updates need weather lookups, so they run after ingestion returns
+        self.sync_executor = ThreadPoolExecutor(max_workers=int(os.getenv("HEALTH_SYNC_WORKERS", "2")))
+        self._pending_syncs = set()
+        self._pending_lock = threading.Lock()
+
+    @property
+    def readings_collection(self):
+        """
+        The time-series readings collection, created on first use, or None if the server does
+        not support time-series collections. Connection errors are not cached, so the next
+        access tries again.
+        """
+        if not self._readings_resolved:
+            with self._readings_lock:
+                if not self._readings_resolved:
+                    self._readings_collection = self._get_readings_collection("health_readings")
+        return self._readings_collection
+
+    def _get_readings_collection(self, name):
+        try:
+            if name not in self.db.list_collection_names():
+                self.db.create_collection(name, timeseries={
+                    "timeField": "recorded_at",
+                    "metaField": "meta",
+                    "granularity": "seconds"
+                })
+        except CollectionInvalid:
+            pass  # created concurrently by another worker
+        except ConnectionFailure as e:
+            print("Mongo unreachable, health readings unavailable for now:", e)
+            return None
+        except PyMongoError as e:
+            print("Time-series collections unavailable, analysis will run client-side:", e)
+            self._readings_resolved = True
+            return None
+        self._readings_resolved = True
+        return self.db[name]
+
+    def ensure_indexes(self):
+        names = super().ensure_indexes()
+        if self.readings_collection is not None:
+            names += self.readings_collection.create_indexes([
+                IndexModel(spec["keys"], **{k: v for k, v in spec.items() if k != "keys"})
+                for spec in self.READINGS_INDEXES
+            ])
+        return names
+
+    def check_query_plans(self):
+        collscans = super().check_query_plans()
+        if self.readings_collection is not None:
+            collscans += self._find_collscans(self.readings_collection, self.READINGS_QUERY_SHAPES)
+        return collscans
+
+    def _reading_values(self, health_data):
+        """
+        Derived factors and metrics of a point, or None if it has no data or the data is invalid
+        (such points are marked synced without a reading, so they never block a sync).
+        Temperature is None when the weather lookup fails.
+        """
+        data = health_data.get("data")
+        if not data or not health_data.get("timestamp"):
+            return None
+        try:
+            self._recorded_at(health_data["timestamp"])
+            values = {
+                "altitude": float(data.get("altitude", 0)),
+                "speed_xy": float(np.hypot(float(data.get("speed_x", 0)), float(data.get("speed_y", 0)))),
+                "speed_z": abs(float(data.get("speed_z", 0))),
+                **{metric: None if data.get(metric) is None else float(data[metric]) for metric in self.METRICS}
+            }
+        except (TypeError, ValueError, AttributeError) as e:
+            print(f"Skipping invalid health data point {health_data.get('point_id')}:", e)
+            return None
+        try:
+            temperature = get_temperature(data.get("latitude"), data.get("longitude"), health_data["timestamp"], default=None)
+        except Exception as e:
+            print(f"Temperature lookup failed for point {health_data.get('point_id')}:", e)
+            temperature = None
+        return {"temperature": temperature, **values}
+
+    def _reading_values_batch(self, health_data_list):
+        """
+        _reading_values for a batch of points; weather for the whole batch is fetched up front
+        with one date-range call per location.
+        """
+        try:
+            prefetch_temperatures_for_points(
+                (h["data"]["latitude"], h["data"]["longitude"], h["timestamp"])
+                for h in health_data_list if h.get("data") and h.get("timestamp")
+            )
+        except Exception as e:
+            print("Weather prefetch failed:", e)
+        return [self._reading_values(health_data) for health_data in health_data_list]
+
+    @staticmethod
+    def _recorded_at(timestamp):
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+
+    @classmethod
+    def _to_reading(cls, health_data, values):
+        """
+        Time-series document for a point and its derived values (validated by _reading_values).
+        """
+        return {
+            "recorded_at": cls._recorded_at(health_data["timestamp"]),
+            "meta": {"user_id": health_data["user_id"], "trip_id": health_data.get("trip_id")},
+            "point_id": health_data["point_id"],
+            **values
+        }
+
+    def schedule_sync(self, user_id):
+        """
+        Run sync_user in the background; a user already waiting for a sync is not queued twice.
+        """
+        with self._pending_lock:
+            if user_id in self._pending_syncs:
+                return
+            self._pending_syncs.add(user_id)
+        self.sync_executor.submit(self._background_sync, user_id)
+
+    def _background_sync(self, user_id):
+        with self._pending_lock:
+            self._pending_syncs.discard(user_id)
+        try:
+            self.sync_user(user_id)
+        except Exception as e:
+            print(f"Health sync failed for user {user_id}, it will be retried on the next sync:", e)
+
+    def _has_pending(self, user_id):
+        return self.collection.find_one({"user_id": user_id, "synced": {"$ne": True}}, {"_id": 1}) is not None
+
+    def sync_user(self, user_id, batch_size=500):
+        """
+        Derive the readings of the user's points that are not synced yet (new and replaced points,
+        and points ingested before readings existed), store them on the points, append them to the
+        time-series readings and fold them into the profile.
+        Runs under the user's profile lease; if another worker holds it, that worker picks up
+        the pending points before it stops. Returns the number of points synced.
+        """
+        if self.profile_handler is None:
+            return self._sync_points(user_id, None, batch_size)
+        synced = 0
+        while self._has_pending(user_id) or self.profile_handler.needs_rebuild(user_id):
+            token = self.profile_handler.acquire(user_id)
+            if token is None:
+                break
+            try:
+                synced += self._sync_points(user_id, token, batch_size)
+            finally:
+                self.profile_handler.release(user_id, token)
+        return synced
+
+    def _sync_points(self, user_id, token, batch_size):
+        profile = self.profile_handler
+        rebuild = profile is not None and profile.needs_rebuild(user_id)
+        if profile is not None:
+            profile.begin(user_id, token)
+
+        synced = 0
+        projection = {
+            "_id": 1, "user_id": 1, "trip_id": 1, "point_id": 1, "timestamp": 1, "data": 1,
+            "ingest_id": 1, "replaced": 1
+        }
+        while True:
+            points = list(self.collection.find({"user_id": user_id, "synced": {"$ne": True}}, projection).limit(batch_size))
+            if not points:
+                break
+            # The old values of a replaced point cannot be taken out of min/max, so rebuild instead
+            rebuild = rebuild or any(point.get("replaced") for point in points)
+            values = self._reading_values_batch(points)
+            if not rebuild:
+                readings = [self._to_reading(point, value) for point, value in zip(points, values) if value]
+                if readings and self.readings_collection is not None:
+                    self.readings_collection.insert_many(readings, ordered=False)
+                if readings and profile is not None:
+                    profile.apply_readings(user_id, token, readings)
+            # A point replaced meanwhile has a new ingest_id and stays unsynced for the next round
+            self.collection.bulk_write([
+                UpdateOne(
+                    {"_id": point["_id"], "ingest_id": point.get("ingest_id")},
+                    {"$set": {"synced": True, "replaced": False, "reading": value}}
+                )
+                for point, value in zip(points, values)
+            ], ordered=False)
+            synced += len(points)
+            if profile is not None:
+                profile.renew(user_id, token)
+
+        if rebuild:
+            self._rebuild_readings(user_id)
+            if profile is not None:
+                profile.replace_buckets(user_id, token, self._profile_buckets(user_id))
+        elif profile is not None:
+            profile.finish(user_id, token)
+        return synced
+
+    def _rebuild_readings(self, user_id):
+        """
+        Replace the user's time-series readings with the readings stored on their synced points.
+        """
+        if self.readings_collection is None:
+            return
+        self.readings_collection.delete_many({"meta.user_id": user_id})
+        projection = {"_id": 0, "user_id": 1, "trip_id": 1, "point_id": 1, "timestamp": 1, "reading": 1}
+        for batch in self.iter_by_query({"user_id": user_id, "synced": True, "reading": {"$ne": None}}, projection):
+            self.readings_collection.insert_many(
+                [self._to_reading(point, point["reading"]) for point in batch], ordered=False
+            )
+
+    def _profile_buckets(self, user_id):
+        """
+        Profile buckets over every synced point of the user, computed by one aggregation
+        so a rebuild never exposes a partially replayed profile.
+        """
+        def group_stage(factor, bucket_size):
+            stage = {"_id": {"$floor": {"$divide": [f"$reading.{factor}", bucket_size]}}}
+            for metric in self.METRICS:
+                value = f"$reading.{metric}"
+                stage[f"{metric}_count"] = {"$sum": {"$cond": [{"$isNumber": value}, 1, 0]}}
+                stage[f"{metric}_sum"] = {"$sum": value}
+                stage[f"{metric}_sumsq"] = {"$sum": {"$multiply": [value, value]}}
+                stage[f"{metric}_min"] = {"$min": value}
+                stage[f"{metric}_max"] = {"$max": value}
+            return [{"$match": {f"reading.{factor}": {"$ne": None}}}, {"$group": stage}]
+
+        pipeline = [
+            {"$match": {"user_id": user_id, "synced": True}},
+            {"$facet": {
+                factor: group_stage(factor, bucket_size)
+                for factor, bucket_size in self.BUCKET_SIZES.items()
+            }}
+        ]
+        facets = next(self.collection.aggregate(pipeline), {})
+
+        buckets = {}
+        for factor, bucket_size in self.BUCKET_SIZES.items():
+            buckets[factor] = {}
+            for group in facets.get(factor, []):
+                buckets[factor][str(int(group["_id"] * bucket_size))] = {
+                    metric: {
+                        "count": group[f"{metric}_count"],
+                        "sum": group[f"{metric}_sum"],
+                        "sumsq": group[f"{metric}_sumsq"],
+                        "min": group[f"{metric}_min"],
+                        "max": group[f"{metric}_max"]
+                    }
+                    for metric in self.METRICS if group[f"{metric}_count"]
+                }
+        return buckets
+
+    def sync_all(self):
+        """
+        Backfill: sync every user with unsynced points. Returns the number of points synced.
+        """
+        return sum(self.sync_user(user_id) for user_id in self.collection.distinct("user_id", {"synced": {"$ne": True}}))
+
+    def schedule_backfill(self):
+        """
+        Run sync_all in the background, e.g. once at startup.
+        """
+        self.sync_executor.submit(self._background_backfill)
+
+    def _background_backfill(self):
+        try:
+            print(f"Health backfill synced {self.sync_all()} points")
+        except Exception as e:
+            print("Health backfill failed:", e)
+
+    def _sync_before_read(self, user_id):
+        # Reads must not fail because a sync did (e.g. a transient Mongo or weather error):
+        # the pending points stay queued and the data synced so far is served
+        try:
+            self.sync_user(user_id)
+        except Exception as e:
+            print(f"Health sync failed for user {user_id}, serving the last synced data:", e)
+
+    def get_health_profile(self, user_id):
+        """
+        Bucket stats over the user's whole history, read from the materialized profile.
+        Pending points are synced first; users ingested before profiles existed get theirs built here.
+        If that sync fails, the last materialized profile is served.
+        """
+        self._sync_before_read(user_id)
+        if self.profile_handler is None:
+            return self.analyze_health_data(user_id, datetime.min, datetime.max)
+        return self.profile_handler.get_stats(user_id) or {factor: {} for factor in self.BUCKET_SIZES}
+
+    def rebuild_health_profile(self, user_id):
+        """
+        Recompute a user's profile and readings from their health_data documents.
+        """
+        if self.profile_handler is not None:
+            self.profile_handler.invalidate(user_id)
+        return self.sync_user(user_id)
+
+    def delete_all(self):
+        if self.readings_collection is not None:
+            self.readings_collection.delete_many({})
+        if self.profile_handler is not None:
+            self.profile_handler.delete_all()
+        return super().delete_all()
 
     def add_health_data(self, user_id, health_data):
         """
@@ -220,119 +739,161 @@ class HealthDataHandler(BaseMongoHandler):
             }
         }
         """
-        health_data["user_id"] = user_id
-        # if same point_id exists for the user, then replace
-        existing_data = self.collection.find_one({"point_id": health_data["point_id"], "user_id": user_id})
-        if existing_data:
-            self.collection.delete_one({"point_id": health_data["point_id"], "user_id": user_id})
-        self.collection.insert_one(health_data)
+        self.add_health_data_bulk(user_id, [health_data])
         return {"message": "Health data added successfully"}
-    
-    def _bucketize(self, value, bucket_size):
-        """Floor value into its bucket."""
-        return int(np.floor(value / bucket_size) * bucket_size)
 
-    def _compute_stats(self, values):
-        """Compute mean, max, min, variance for a list of values."""
-        if not values:
-            return None
-        arr = np.array(values)
-        return {
-            "mean": float(np.mean(arr)),
-            "max": float(np.max(arr)),
-            "min": float(np.min(arr)),
-            "var": float(np.var(arr))
-        }
+    def add_health_data_bulk(self, user_id, health_data_list, chunk_size=1000):
+        """
+        Add many health data points for a user.
+        Each point replaces any existing point with the same point_id for the user.
+        Points are written with unordered bulk_write calls of up to chunk_size operations,
+        so one round trip covers a whole chunk instead of three per point.
+        Points are written unsynced; their readings and profile updates are derived by a
+        background sync_user, so a slow or failing weather API never fails an ingestion.
+        Replaced points make that sync rebuild the user's readings and profile.
+        """
+        upserted, modified = 0, 0
+        for start in range(0, len(health_data_list), chunk_size):
+            chunk = health_data_list[start:start + chunk_size]
+            ingest_id = uuid.uuid4().hex
+            operations = []
+            for health_data in chunk:
+                health_data["user_id"] = user_id
+                operations.append(ReplaceOne(
+                    {"user_id": user_id, "point_id": health_data["point_id"]},
+                    {**health_data, "synced": False, "replaced": True, "ingest_id": ingest_id},
+                    upsert=True
+                ))
+            result = self.collection.bulk_write(operations, ordered=False)
+            upserted += result.upserted_count
+            modified += result.modified_count
+            # Points are written as replacements and cleared once known to be new, so an
+            # interrupted ingestion errs towards a profile rebuild rather than a double count
+            if result.upserted_ids:
+                self.collection.update_many(
+                    {"_id": {"$in": list(result.upserted_ids.values())}, "ingest_id": ingest_id},
+                    {"$set": {"replaced": False}}
+                )
+        if health_data_list:
+            self.schedule_sync(user_id)
+        return {"message": "Health data added successfully", "upserted": upserted, "modified": modified}
     
-    def get_health_data(self, user_id, trip_id):
+    def get_health_data(self, user_id, trip_id, projection=None, serialize_ids=False):
         """
         Retrieve all health data for a user in a specific trip.
         """
-        records = list(self.collection.find({
+        records = self.get_by_query({
             "user_id": user_id,
             "trip_id": trip_id
-        }))
+        }, projection=projection or {field: 0 for field in self.SYNC_FIELDS}, serialize_ids=serialize_ids)
         return records
 
     def analyze_health_data(self, user_id, start_time, end_time):
         """
         Analyze health data for a user in the given time range.
         Creates bucketed mappings of (temp, altitude, speed_xy, speed_z) → health stats.
+        Stats are computed exactly over the whole range by an aggregation on the
+        time-series readings; without a readings collection the client-side path is used.
         """
-        # Query only relevant records
-        records = list(self.collection.find({
-            "user_id": user_id,
-            # "timestamp": {"$gte": start_time, "$lte": end_time}
-        }))
-        print(f"Found {len(records)} records for user {user_id} between {start_time} and {end_time}")
-
-        # Use defaultdict for metrics per bucket
-        factor_buckets = {
-            "temperature": defaultdict(lambda: defaultdict(list)),
-            "altitude": defaultdict(lambda: defaultdict(list)),
-            "speed_xy": defaultdict(lambda: defaultdict(list)),
-            "speed_z": defaultdict(lambda: defaultdict(list))
-        }
-
-        # Precompute bucketization factors
-        bucket_sizes = {
-            "temperature": 5,
-            "altitude": 10,
-            "speed_xy": 5*5/18,
-            "speed_z": 5*5/18
-        }
-        # randomly sample 10 records
-        sampled_records = sample(records, min(len(records), 10))
-        
-        for rec in sampled_records:
-            print(f"Processing record: {rec.get('point_id')}")
-            data = rec.get("data")
-            if not data:
-                continue
-
-            lat, lon, ts = data.get("latitude"), data.get("longitude"), rec.get("timestamp")
-            temp = get_temperature(lat, lon, ts)
-            speed_x, speed_y, speed_z_val = data.get("speed_x", 0), data.get("speed_y", 0), data.get("speed_z", 0)
-            speed_xy = np.hypot(speed_x, speed_y)
-            altitude = data.get("altitude", 0)
-            speed_z_abs = abs(speed_z_val)
-
-            # Bucket values
-            buckets = {
-                "temperature": self._bucketize(temp, bucket_sizes["temperature"]),
-                "altitude": self._bucketize(altitude, bucket_sizes["altitude"]),
-                "speed_xy": self._bucketize(speed_xy, bucket_sizes["speed_xy"]),
-                "speed_z": self._bucketize(speed_z_abs, bucket_sizes["speed_z"])
-            }
-
-            # Health metrics
-            metrics = {
-                "heart_rate": data.get("heart_rate"),
-                "calories_burned": data.get("calories_burned"),
-                "o2_saturation": data.get("o2_saturation")
-            }
-
-            # Collect metrics per bucket
-            for factor, bucket in buckets.items():
-                for metric, value in metrics.items():
-                    if value is not None:
-                        factor_buckets[factor][bucket][metric].append(value)
+        self._sync_before_read(user_id)
+        if self.readings_collection is not None:
+            try:
+                return self._aggregate_health_stats(user_id, start_time, end_time)
+            except PyMongoError as e:
+                print("Health aggregation failed, falling back to client-side analysis:", e)
+        return self._analyze_health_records(user_id, start_time, end_time)
+
+    def _aggregate_health_stats(self, user_id, start_time, end_time):
+        """
+        One $match over the user's readings in the range, then a $facet with one $group per factor
+        computing mean/max/min/variance of every metric per bucket.
+        """
+        def group_stage(factor, bucket_size):
+            stage = {"_id": {"$floor": {"$divide": [f"${factor}", bucket_size]}}}
+            for metric in self.METRICS:
+                stage[f"{metric}_mean"] = {"$avg": f"${metric}"}
+                stage[f"{metric}_max"] = {"$max": f"${metric}"}
+                stage[f"{metric}_min"] = {"$min": f"${metric}"}
+                stage[f"{metric}_std"] = {"$stdDevPop": f"${metric}"}
+            return [{"$match": {factor: {"$ne": None}}}, {"$group": stage}]
+
+        pipeline = [
+            {"$match": {
+                "meta.user_id": user_id,
+                "recorded_at": {"$gte": start_time, "$lte": end_time}
+            }},
+            {"$facet": {
+                factor: group_stage(factor, bucket_size)
+                for factor, bucket_size in self.BUCKET_SIZES.items()
+            }}
+        ]
+        facets = next(self.readings_collection.aggregate(pipeline), {})
 
-        # Compute stats per bucket
         results = {}
-        for factor, buckets in factor_buckets.items():
-            results[factor] = {
-                bucket: {
-                    f"{metric}_stats": self._compute_stats(values)
-                    for metric, values in metrics.items()
-                } if metrics else None
-                for bucket, metrics in buckets.items()
-            }
-
+        for factor, bucket_size in self.BUCKET_SIZES.items():
+            results[factor] = {}
+            for group in facets.get(factor, []):
+                bucket = int(group["_id"] * bucket_size)
+                results[factor][bucket] = {
+                    f"{metric}_stats": {
+                        "mean": float(group[f"{metric}_mean"]),
+                        "max": float(group[f"{metric}_max"]),
+                        "min": float(group[f"{metric}_min"]),
+                        "var": float(group[f"{metric}_std"]) ** 2
+                    } if group[f"{metric}_min"] is not None else None
+                    for metric in self.METRICS
+                }
         return results
 
+    def _analyze_health_records(self, user_id, start_time, end_time):
+        """
+        Client-side analysis (used when time-series collections are unavailable) over the
+        readings stored on the synced points. The projected cursor is read straight into one
+        float array and bucketed with the vectorized engine in app.service.health_stats.
+        """
+        names = (*self.BUCKET_SIZES, *self.METRICS)
+        cursor = self.collection.find(
+            {
+                "user_id": user_id,
+                # Timestamps are stored as ISO strings, which compare in time order
+                "timestamp": {"$gte": self._iso(start_time), "$lte": self._iso(end_time)},
+                "synced": True,
+                "reading": {"$ne": None}
+            },
+            {"_id": 0, **{f"reading.{name}": 1 for name in names}}
+        ).batch_size(1000)
+        # None → NaN so missing values drop out of the grouped stats
+        rows = np.array(
+            [tuple(doc["reading"].get(name) for name in names) for doc in cursor], dtype=np.float64
+        ).reshape(-1, len(names))
+        print(f"Found {len(rows)} records for user {user_id} between {start_time} and {end_time}")
+
+        columns = dict(zip(names, rows.T))
+        return bucket_stats(
+            {factor: columns[factor] for factor in self.BUCKET_SIZES},
+            {metric: columns[metric] for metric in self.METRICS},
+            self.BUCKET_SIZES
+        )
+
+    @staticmethod
+    def _iso(value):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat()
+
 
 class AlertHandler(BaseMongoHandler):
+    INDEXES = [
+        {"keys": [("alert_id", ASCENDING)], "unique": True},
+        {"keys": [("user_id", ASCENDING)]},
+    ]
+    QUERY_SHAPES = [
+        {"alert_id": ""},
+        {"user_id": ""},
+    ]
+    # Fields returned when listing a user's alerts
+    LIST_PROJECTION = {"alert_id": 1, "user_id": 1, "timestamp": 1, "metadata": 1}
+
     def __init__(self):
         super().__init__(collection_name="alerts")
         
@@ -362,14 +923,11 @@ class AlertHandler(BaseMongoHandler):
         if metadata.get('severity') not in allowed_severities:
             return {"error": f"Invalid severity level. Allowed levels: {allowed_severities}"}
 
-        existing_alert = self.collection.find_one({"alert_id": alert["alert_id"]})
-        if existing_alert:
-            self.collection.delete_one({"alert_id": alert["alert_id"]})
-        self.collection.insert_one(alert)
+        self.collection.replace_one({"alert_id": alert["alert_id"]}, alert, upsert=True)
         return {"message": "Alert added successfully"}
 
-    def get_by_user_id(self, user_id):
-        alerts = list(self.collection.find({"user_id": user_id}))
+    def get_by_user_id(self, user_id, projection=None, serialize_ids=False):
+        alerts = self.get_by_query({"user_id": user_id}, projection=projection, serialize_ids=serialize_ids)
         return alerts
 
 
@@ -379,5 +937,30 @@ class AlertHandler(BaseMongoHandler):
 
 USER_HANDLER = UserHandler()
 TRIP_HANDLER = TripHandler()
-HEALTH_DATA_HANDLER = HealthDataHandler()
-ALERT_HANDLER = AlertHandler()
\ No newline at end of file
+HEALTH_PROFILE_HANDLER = HealthProfileHandler(
+    HealthDataHandler.BUCKET_SIZES, HealthDataHandler.METRICS,
+    lease_seconds=float(os.getenv("HEALTH_PROFILE_LEASE_SECONDS", "300"))
+)
+HEALTH_DATA_HANDLER = HealthDataHandler(profile_handler=HEALTH_PROFILE_HANDLER)
+ALERT_HANDLER = AlertHandler()
+
+
+def ensure_all_indexes():
+    """
+    Create the declared indexes of every fsq_db handler. Safe to run on every startup.
+    """
+    for handler in (USER_HANDLER, TRIP_HANDLER, HEALTH_DATA_HANDLER, HEALTH_PROFILE_HANDLER, ALERT_HANDLER):
+        try:
+            handler.ensure_indexes()
+        except Exception as e:
+            print(f"Failed to ensure indexes on {handler.collection.name}: {e}")
+
+
+def check_all_query_plans():
+    """
+    Returns {collection_name: [filters that still COLLSCAN]} for every fsq_db handler.
+    """
+    return {
+        handler.collection.name: handler.check_query_plans()
+        for handler in (USER_HANDLER, TRIP_HANDLER, HEALTH_DATA_HANDLER, HEALTH_PROFILE_HANDLER, ALERT_HANDLER)
+    }
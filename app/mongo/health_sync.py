@@ -0,0 +1,25 @@
+"""
+Backfill of the health readings and profiles from existing health_data documents.
+
+Usage:
+    python -m app.mongo.health_sync                  # every user with unsynced points
+    python -m app.mongo.health_sync --user user-1    # one user
+"""
+import argparse
+from app.mongo.fsq_handlers import HEALTH_DATA_HANDLER
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync health readings and profiles from health_data.")
+    parser.add_argument("--user", help="Only sync this user.")
+    args = parser.parse_args()
+
+    if args.user:
+        synced = HEALTH_DATA_HANDLER.sync_user(args.user)
+    else:
+        synced = HEALTH_DATA_HANDLER.sync_all()
+    print(f"Synced {synced} health data points.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Index provisioning for the fsq_db collections.
+
+Usage:
+    python -m app.mongo.indexes            # create missing indexes
+    python -m app.mongo.indexes --check    # also report hot queries that still COLLSCAN
+"""
+import argparse
+from app.mongo.fsq_handlers import ensure_all_indexes, check_all_query_plans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provision and check fsq_db indexes.")
+    parser.add_argument("--check", action="store_true", help="Explain handler queries and report COLLSCANs.")
+    args = parser.parse_args()
+
+    ensure_all_indexes()
+    print("Indexes ensured.")
+
+    if args.check:
+        failing = {name: queries for name, queries in check_all_query_plans().items() if queries}
+        if not failing:
+            print("All handler queries use an index.")
+            return
+        for name, queries in failing.items():
+            for query in queries:
+                print(f"COLLSCAN on {name}: {query}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
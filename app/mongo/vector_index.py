@@ -0,0 +1,178 @@
+import time
+import threading
+import numpy as np
+from pymongo.errors import PyMongoError
+from app.llms.utils.logger import LOGGER
+
+
+class MongoVectorIndex:
+    """
+    Nearest-neighbour index over the embedding field of a Mongo collection.
+
+    If `atlas_index_name` is given, queries are delegated to Atlas `$vectorSearch`,
+    which needs an explicit limit: `top_k=None` returns at most `atlas_max_results` matches.
+    Otherwise the vectors are held locally as an L2-normalised float32 matrix so a
+    query is a single matrix-vector product plus `argpartition`. The matrix is kept
+    current from a change stream; deployments without change streams (standalone
+    mongod) fall back to reloading it at most every `refresh_interval` seconds.
+    """
+
+    def __init__(self, collection, vector_field="vector", atlas_index_name=None, refresh_interval=60,
+                 atlas_max_results=100):
+        self.collection = collection
+        self.vector_field = vector_field
+        self.atlas_index_name = atlas_index_name
+        self.refresh_interval = refresh_interval
+        self.atlas_max_results = atlas_max_results
+
+        self._lock = threading.Lock()
+        self._ids = []
+        self._rows = {}
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._size = 0
+        self._loaded_at = None
+        self._watching = False
+
+        if atlas_index_name is None:
+            stream = self._open_change_stream()
+            self._load()
+            if stream is not None:
+                self._watching = True
+                threading.Thread(target=self._follow, args=(stream,), daemon=True).start()
+
+    # ------------------------------------------------------------------ #
+    # Local matrix maintenance
+    # ------------------------------------------------------------------ #
+
+    def _open_change_stream(self):
+        try:
+            # Only the vector of the looked-up document is needed, not the whole document
+            pipeline = [{"$project": {"operationType": 1, "documentKey": 1, f"fullDocument.{self.vector_field}": 1}}]
+            return self.collection.watch(pipeline, full_document="updateLookup")
+        except PyMongoError as e:
+            LOGGER.warning(f"Change streams unavailable for {self.collection.name}, using periodic refresh: {e}")
+            return None
+
+    def _load(self):
+        ids, vectors = [], []
+        cursor = self.collection.find(
+            {self.vector_field: {"$exists": True}},
+            {self.vector_field: 1}
+        )
+        for doc in cursor:
+            ids.append(doc["_id"])
+            vectors.append(doc[self.vector_field])
+
+        matrix = self._normalize(np.asarray(vectors, dtype=np.float32)) if vectors else np.empty((0, 0), dtype=np.float32)
+        with self._lock:
+            self._ids = ids
+            self._rows = {doc_id: i for i, doc_id in enumerate(ids)}
+            self._matrix = matrix
+            self._size = len(ids)
+            self._loaded_at = time.monotonic()
+
+    @staticmethod
+    def _normalize(vectors):
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _upsert(self, doc_id, vector):
+        vector = self._normalize(np.asarray(vector, dtype=np.float32))
+        with self._lock:
+            if doc_id in self._rows:
+                self._matrix[self._rows[doc_id]] = vector
+                return
+            if self._size == 0 and self._matrix.shape[1] != vector.shape[0]:
+                self._matrix = np.empty((16, vector.shape[0]), dtype=np.float32)
+            if self._size == self._matrix.shape[0]:
+                # Grow geometrically so appends stay amortised O(1)
+                grown = np.empty((max(16, 2 * self._size), self._matrix.shape[1]), dtype=np.float32)
+                grown[:self._size] = self._matrix[:self._size]
+                self._matrix = grown
+            self._matrix[self._size] = vector
+            self._rows[doc_id] = self._size
+            self._ids.append(doc_id)
+            self._size += 1
+
+    def _remove(self, doc_id):
+        with self._lock:
+            row = self._rows.pop(doc_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                # Move the last row into the hole
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = self._ids[last]
+                self._rows[self._ids[row]] = row
+            self._ids.pop()
+            self._size -= 1
+
+    def _follow(self, stream):
+        try:
+            with stream:
+                for change in stream:
+                    doc_id = change["documentKey"]["_id"]
+                    doc = change.get("fullDocument")
+                    if change["operationType"] == "delete" or doc is None or self.vector_field not in doc:
+                        self._remove(doc_id)
+                    else:
+                        self._upsert(doc_id, doc[self.vector_field])
+        except Exception as e:
+            # Any failure (not just driver errors) must not leave search trusting a dead stream
+            LOGGER.error(f"Change stream for {self.collection.name} stopped, using periodic refresh: {e}")
+        finally:
+            self._watching = False
+
+    # ------------------------------------------------------------------ #
+    # Queries
+    # ------------------------------------------------------------------ #
+
+    def search(self, query_vector, top_k=None, similarity_threshold=None):
+        """
+        Returns [(_id, cosine_similarity), ...] sorted by decreasing similarity.
+        `top_k=None` returns every match above `similarity_threshold`; with Atlas it
+        returns at most `atlas_max_results` of them.
+        """
+        if self.atlas_index_name is not None:
+            return self._search_atlas(query_vector, top_k or self.atlas_max_results, similarity_threshold)
+
+        if not self._watching and time.monotonic() - self._loaded_at > self.refresh_interval:
+            self._load()
+
+        query = self._normalize(np.asarray(query_vector, dtype=np.float32).reshape(-1))
+        with self._lock:
+            if self._size == 0:
+                return []
+            scores = self._matrix[:self._size] @ query
+            ids = list(self._ids)
+
+        candidates = np.arange(len(scores))
+        if similarity_threshold is not None:
+            candidates = candidates[scores > similarity_threshold]
+        if top_k is not None and top_k < len(candidates):
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [(ids[i], float(scores[i])) for i in candidates]
+
+    def _search_atlas(self, query_vector, top_k, similarity_threshold):
+        pipeline = [
+            {
+                "$vectorSearch": {
+                    "index": self.atlas_index_name,
+                    "path": self.vector_field,
+                    "queryVector": np.asarray(query_vector, dtype=float).tolist(),
+                    "numCandidates": top_k * 10,
+                    "limit": top_k,
+                }
+            },
+            {"$project": {"_id": 1, "score": {"$meta": "vectorSearchScore"}}},
+        ]
+        results = []
+        for doc in self.collection.aggregate(pipeline):
+            # Atlas reports cosine scores as (1 + cos) / 2
+            similarity = 2 * doc["score"] - 1
+            if similarity_threshold is None or similarity > similarity_threshold:
+                results.append((doc["_id"], similarity))
+        return results
@@ -1,72 +1,205 @@
+import os
+import threading
 import googlemaps
-import requests
-from datetime import datetime
+from concurrent.futures import Future
+from datetime import datetime, date as date_type, timedelta
 from dotenv import load_dotenv
+from app.service.weather_cache import WeatherCache, MISSING
+from app.llms.utils.http_client import HTTP_CLIENT
 load_dotenv()
 
-def get_temperature(lat, lon, timestamp):
-    date = timestamp.split("T")[0]
-    today = datetime.utcnow().strftime("%Y-%m-%d")
-    
-    if date < today:  # Historical (Archive API)
-        weather_url = (
-            f"https://archive-api.open-meteo.com/v1/archive?"
-            f"latitude={lat}&longitude={lon}"
-            f"&start_date={date}&end_date={date}"
-            f"&daily=temperature_2m_max,temperature_2m_min"
-            f"&timezone=UTC"
+DEFAULT_TEMPERATURE = 25
+# Lookups are snapped to a grid of this many degrees (0.1° ≈ 11 km, about the resolution of the weather models)
+WEATHER_GRID_DEGREES = float(os.getenv("WEATHER_GRID_DEGREES", "0.1"))
+# Archive values never change; forecasts are refreshed hourly
+WEATHER_ARCHIVE_TTL = float(os.getenv("WEATHER_ARCHIVE_TTL_SECONDS", str(30 * 24 * 3600)))
+WEATHER_FORECAST_TTL = float(os.getenv("WEATHER_FORECAST_TTL_SECONDS", "3600"))
+# Days without data (archive lag, outside the forecast range, failed calls) are retried after this long
+WEATHER_MISS_TTL = float(os.getenv("WEATHER_MISS_TTL_SECONDS", "600"))
+
+WEATHER_CACHE = WeatherCache(
+    path=os.getenv("WEATHER_CACHE_PATH") or None,
+    max_memory_items=int(os.getenv("WEATHER_CACHE_MEMORY_ITEMS", "10000"))
+)
+
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def _grid(value):
+    return round(round(value / WEATHER_GRID_DEGREES) * WEATHER_GRID_DEGREES, 6)
+
+
+def _cache_key(lat, lon, date):
+    return f"{lat}:{lon}:{date}"
+
+
+def _fetch_daily_temperatures(lat, lon, start_date, end_date, archive):
+    """
+    One Open-Meteo call for every day in [start_date, end_date]. Returns {date: mean temperature}.
+    """
+    host = "https://archive-api.open-meteo.com/v1/archive" if archive else "https://api.open-meteo.com/v1/forecast"
+    weather_url = (
+        f"{host}?"
+        f"latitude={lat}&longitude={lon}"
+        f"&start_date={start_date}&end_date={end_date}"
+        f"&daily=temperature_2m_max,temperature_2m_min"
+        f"&timezone=UTC"
+    )
+    weather_data = HTTP_CLIENT.get(weather_url).json()
+    daily = weather_data.get("daily", {})
+    temperatures = {}
+    for day, t_max, t_min in zip(daily.get("time", []), daily.get("temperature_2m_max", []), daily.get("temperature_2m_min", [])):
+        if t_max is not None and t_min is not None:
+            temperatures[day] = (t_max + t_min) / 2
+    return temperatures
+
+
+def _coalesced_fetch(lat, lon, days, archive):
+    """
+    Concurrent callers asking for the same range share one HTTP call.
+    Fetched days are written to WEATHER_CACHE before the waiters are released; days without
+    data, including every day of a failed call, are cached as misses for WEATHER_MISS_TTL.
+    """
+    request_key = (lat, lon, days[0], days[-1], archive)
+    with _in_flight_lock:
+        future = _in_flight.get(request_key)
+        owner = future is None
+        if owner:
+            future = _in_flight[request_key] = Future()
+    if not owner:
+        return future.result()
+
+    try:
+        try:
+            temperatures = _fetch_daily_temperatures(lat, lon, days[0], days[-1], archive)
+        except Exception as e:
+            print(f"Weather fetch failed for {lat},{lon} {days[0]}..{days[-1]}:", e)
+            temperatures = {}
+        WEATHER_CACHE.put_many(
+            {_cache_key(lat, lon, day): value for day, value in temperatures.items()},
+            ttl=WEATHER_ARCHIVE_TTL if archive else WEATHER_FORECAST_TTL
         )
-    else:  # Forecast (Forecast API)
-        weather_url = (
-            f"https://api.open-meteo.com/v1/forecast?"
-            f"latitude={lat}&longitude={lon}"
-            f"&start_date={date}&end_date={date}"
-            f"&daily=temperature_2m_max,temperature_2m_min"
-            f"&timezone=UTC"
+        WEATHER_CACHE.put_missing(
+            [_cache_key(lat, lon, day) for day in days if day not in temperatures], ttl=WEATHER_MISS_TTL
         )
-        
-    weather_data = requests.get(weather_url).json()
-    temperature = 25
-    if "daily" in weather_data and "temperature_2m_max" in weather_data["daily"]:
-        t_max = weather_data["daily"]["temperature_2m_max"][0]
-        t_min = weather_data["daily"]["temperature_2m_min"][0]
-        temperature = (t_max + t_min) / 2
-    return temperature
+        future.set_result(temperatures)
+        return temperatures
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(request_key, None)
 
 
+def prefetch_temperatures(lat, lon, start_date, end_date):
+    """
+    Warm the cache for every day of a trip with at most one archive and one forecast call.
+    Dates are 'YYYY-MM-DD' strings. Returns {date: temperature} for the days that have data.
+    """
+    lat, lon = _grid(lat), _grid(lon)
+    today = datetime.utcnow().strftime("%Y-%m-%d")
 
-def get_place_info(place_name, api_key, date=None, use_google_elevation=False):
+    days = []
+    day = date_type.fromisoformat(start_date)
+    while day.isoformat() <= end_date:
+        days.append(day.isoformat())
+        day += timedelta(days=1)
+
+    temperatures = {}
+    missing = []
+    for day in days:
+        cached = WEATHER_CACHE.get(_cache_key(lat, lon, day))
+        if cached is None:
+            missing.append(day)
+        elif cached is not MISSING:
+            temperatures[day] = cached
+
+    past = [day for day in missing if day < today]
+    future = [day for day in missing if day >= today]
+    if past:
+        temperatures.update(_coalesced_fetch(lat, lon, past, archive=True))
+    if future:
+        temperatures.update(_coalesced_fetch(lat, lon, future, archive=False))
+    return temperatures
+
+
+def prefetch_temperatures_for_points(points):
     """
-    Get latitude, longitude, altitude, and temperature for a place and date.
-    - place_name: Name of the place
-    - api_key: Google Maps API key (for geocoding, optional for elevation)
-    - date: 'YYYY-MM-DD' string (past = history, today/future = forecast)
-    - use_google_elevation: If True, use Google Elevation API, else Open-Elevation
+    Warm the cache for (lat, lon, timestamp) points, e.g. a batch of health data:
+    one date-range fetch per grid cell instead of one call per point.
     """
-    gmaps = googlemaps.Client(key=api_key)
+    ranges = {}
+    for lat, lon, timestamp in points:
+        date = timestamp.split("T")[0]
+        cell = (_grid(lat), _grid(lon))
+        start, end = ranges.get(cell, (date, date))
+        ranges[cell] = (min(start, date), max(end, date))
+    for (lat, lon), (start_date, end_date) in ranges.items():
+        prefetch_temperatures(lat, lon, start_date, end_date)
 
-    # Step 1: Geocoding
-    geocode_result = gmaps.geocode(place_name)
+
+def get_temperature(lat, lon, timestamp, default=DEFAULT_TEMPERATURE):
+    """
+    Daily mean temperature at (lat, lon) on the timestamp's date, or default if there is no data.
+    """
+    date = timestamp.split("T")[0]
+    temperature = prefetch_temperatures(lat, lon, date, date).get(date)
+    return default if temperature is None else temperature
+
+
+
+def _maps_client(api_key):
+    return googlemaps.Client(key=api_key, timeout=HTTP_CLIENT.timeout[1], requests_session=HTTP_CLIENT.session)
+
+
+def geocode_place(place_name, api_key):
+    """
+    Returns (lat, lon, formatted address) for a place name, or None if it cannot be geocoded.
+    """
+    geocode_result = _maps_client(api_key).geocode(place_name)
     if not geocode_result:
         return None
-    
     loc = geocode_result[0]['geometry']['location']
-    lat, lon = loc['lat'], loc['lng']
-    address = geocode_result[0]['formatted_address']
+    return loc['lat'], loc['lng'], geocode_result[0]['formatted_address']
 
-    # Step 2: Altitude
+
+def get_altitude(lat, lon, api_key=None, use_google_elevation=False):
+    """
+    Elevation in meters from Google Elevation (if requested) with Open-Elevation as fallback.
+    """
     altitude = None
     if use_google_elevation:
         try:
-            elev_result = gmaps.elevation((lat, lon))
+            elev_result = _maps_client(api_key).elevation((lat, lon))
             altitude = elev_result[0]['elevation'] if elev_result else None
         except Exception as e:
             print("Google Elevation API failed:", e)
 
     if altitude is None:  # fallback to Open-Elevation
         url = f"https://api.open-elevation.com/api/v1/lookup?locations={lat},{lon}"
-        response = requests.get(url).json()
+        response = HTTP_CLIENT.get(url).json()
         altitude = response["results"][0]["elevation"] if "results" in response else None
+    return altitude
+
+
+def get_place_info(place_name, api_key, date=None, use_google_elevation=False):
+    """
+    Get latitude, longitude, altitude, and temperature for a place and date.
+    - place_name: Name of the place
+    - api_key: Google Maps API key (for geocoding, optional for elevation)
+    - date: 'YYYY-MM-DD' string (past = history, today/future = forecast)
+    - use_google_elevation: If True, use Google Elevation API, else Open-Elevation
+    """
+    # Step 1: Geocoding
+    geocoded = geocode_place(place_name, api_key)
+    if not geocoded:
+        return None
+    lat, lon, address = geocoded
+
+    # Step 2: Altitude
+    altitude = get_altitude(lat, lon, api_key, use_google_elevation)
 
     # Step 3: Temperature (past vs future)
     print("Fetching temperature for date:", date, "at location:", lat, lon)
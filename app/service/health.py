@@ -1,11 +1,14 @@
 from pydantic import BaseModel, Field
 from app.llms.openai import LangchainOpenaiJsonEngine
-from app.service.geo import get_place_info
+from app.llms.utils.response_cache import default_response_cache
+from app.service.geo import geocode_place, get_altitude, get_temperature
 from app.mongo.fsq_handlers import HEALTH_DATA_HANDLER, ALERT_HANDLER
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import time
 import os
 import numpy as np  
-import requests
+from app.llms.utils.http_client import HTTP_CLIENT
 
 from pydantic import BaseModel, Field
 
@@ -45,7 +48,8 @@ Your task is to identify if the user has mentioned location (address) and extrac
 User may mention places like cities, tourist spots, landmarks, or specific addresses.
             """,
             sampleBaseModel=ScenarioMentioned,
-            temperature=0.2
+            temperature=0.2,
+            response_cache=default_response_cache()
         )
 
         self.llm_engine_1 = LangchainOpenaiJsonEngine(
@@ -54,7 +58,8 @@ User may mention places like cities, tourist spots, landmarks, or specific addre
 Like if user says they are going to a high altitude place in winter, you should infer low temperature and high altitude out of common knowledge.
             """,
             sampleBaseModel=InferredScenario,
-            temperature=0.2
+            temperature=0.2,
+            response_cache=default_response_cache()
         )
 
         self.llm_engine_2 = LangchainOpenaiJsonEngine(
@@ -73,14 +78,15 @@ Risk is consdered if
 
         self.health_data_handler = HEALTH_DATA_HANDLER
         self.alert_handler = ALERT_HANDLER
+        # Runs the independent stages of run() concurrently and the alert writes in the background
+        self.executor = ThreadPoolExecutor(max_workers=int(os.getenv("HEALTH_ALERT_WORKERS", "8")))
 
 
     def get_closest_health_data(self, user_id: str, temp: float, altitude: float):
-        analysis = self.health_data_handler.analyze_health_data(
-            user_id,
-            start_time=datetime(2020,10,1,6,0,0),
-            end_time=datetime(2027,10,1,8,0,0)
-        )
+        analysis = self.health_data_handler.get_health_profile(user_id)
+        return self.closest_buckets(analysis, temp, altitude)
+
+    def closest_buckets(self, analysis: dict, temp: float, altitude: float):
         # Find closest buckets
         closest = {}
         for factor in ["temperature", "altitude"]: 
@@ -140,17 +146,24 @@ Risk is consdered if
         
         self.alert_handler.add_alert(user_id, timestamp, metadata)
 
-    def push_pharmacy_alert(self, user_id: str, lat: float, lon: float, alert: str):
+    def fetch_nearby_pharmacies(self, lat: float, lon: float):
         foursquare_microservice_url = os.getenv("FOURSQUARE_MICROSERVICE_URL","http://13.126.242.38:5000/api/foursquare/search?query=pharmacy&ll={lat},{lon}&radius=100")
         foursquare_microservice_url = foursquare_microservice_url.format(lat=lat, lon=lon)
         try:
-            response = requests.get(foursquare_microservice_url)
+            response = HTTP_CLIENT.get(foursquare_microservice_url)
             if response.status_code != 200:
                 print("Failed to fetch nearby pharmacies")
-                return
-            data = response.json()
-            results = data["results"][:2]
-            for r in results:
+                return []
+            return response.json()["results"][:2]
+        except Exception as e:
+            print("Error fetching pharmacies:", str(e))
+            return []
+
+    def push_pharmacy_alert(self, user_id: str, lat: float, lon: float, alert: str, pharmacies=None):
+        if pharmacies is None:
+            pharmacies = self.fetch_nearby_pharmacies(lat, lon)
+        try:
+            for r in pharmacies:
                 name = r.get("name")
                 location = r.get("location", {})
                 location_str = ",\n".join(f"{k}: {v}" for k, v in location.items() if v)
@@ -168,13 +181,52 @@ Risk is consdered if
                 print("Pushing pharmacy alert:", metadata)
                 self.alert_handler.add_alert(user_id, datetime.utcnow().isoformat(), metadata)
         except Exception as e:
-            print("Error fetching pharmacies:", str(e))
+            print("Error pushing pharmacy alerts:", str(e))
             return
 
+    def _timed(self, timings: dict, stage: str, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            timings[stage] = round(time.perf_counter() - start, 3)
+
+    def _submit(self, timings: dict, stage: str, fn, *args):
+        return self.executor.submit(self._timed, timings, stage, fn, *args)
+
+    def _push_alerts(self, user_id: str, lat: float, lon: float, alert: dict, pharmacies, timings: dict):
+        """
+        `timings` belongs to the background stages (it already receives the pharmacy lookup),
+        so it is never shared with the response returned by run().
+        """
+        try:
+            self._timed(timings, "health_alert_write", self.push_health_alert, user_id, alert)
+            self._timed(timings, "pharmacy_alert_write", self.push_pharmacy_alert,
+                        user_id, lat, lon, alert['message'], pharmacies.result())
+        except Exception as e:
+            print("Error pushing alerts:", str(e))
+        print("Background stage timings (s):", timings)
 
     def run(self, user_id:str, user_input: str):
+        """
+        Stages run as a dependency graph, so latency is roughly the critical path
+        location extraction → geocode → max(elevation, weather) → alert generation:
+
+            health profile ─────────────────────────┐
+            location → geocode ─┬─ elevation ───────┼─→ closest buckets → alert LLM → alert writes (background)
+                                ├─ weather ─────────┘                                  ↑
+                                └─ pharmacy lookup ─────────────────────────────────────┘
+        Seconds spent per stage on the response path are returned under "timings";
+        the pharmacy lookup and alert writes are logged by the background task.
+        """
+        timings = {}
+        start = time.perf_counter()
+        api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+        # Only needs the user, so it overlaps with everything up to the alert LLM
+        profile = self._submit(timings, "health_profile", self.health_data_handler.get_health_profile, user_id)
+
         # Step 1: Extract location information
-        result = self.llm_engine_0.run(user_input)[0]
+        result = self._timed(timings, "location_extraction", self.llm_engine_0.run, user_input)[0]
         print(result)
         if not result['is_address'] and not result['destination']:
             print("No address mentioned, cannot infer scenario.")
@@ -184,22 +236,32 @@ Risk is consdered if
             
         today = datetime.utcnow().strftime("%Y-%m-%d")
         # Step 2: Infer scenario details
-        fetched_info = get_place_info(result['destination'], 
-                                      os.getenv("GOOGLE_MAPS_API_KEY"),
-                                       date=today,
-                                        use_google_elevation=True)
-        print("Fetched place info:", fetched_info)
-        if not fetched_info:
+        geocoded = self._timed(timings, "geocode", geocode_place, result['destination'], api_key)
+        if not geocoded:
             print("Failed to fetch place info")
             return {}
-        
-        closest_health_data = self.get_closest_health_data(user_id, 
-                                                        fetched_info['temperature_C'], 
-                                                        fetched_info['altitude_m'])
-        fetched_info['closest_health_data'] = closest_health_data
+        lat, lon, address = geocoded
+        altitude = self._submit(timings, "elevation", get_altitude, lat, lon, api_key, True)
+        temperature = self._submit(timings, "weather", get_temperature, lat, lon, f"{today}T12:00:00")
+        # Only the background alert writes wait for this, so it reports into their own timings
+        background_timings = {}
+        pharmacies = self._submit(background_timings, "pharmacy_lookup", self.fetch_nearby_pharmacies, lat, lon)
+
+        fetched_info = {
+            "lat": lat,
+            "lon": lon,
+            "address": address,
+            "altitude_m": altitude.result(),
+            "temperature_C": temperature.result(),
+        }
+        print("Fetched place info:", fetched_info)
+
+        fetched_info['closest_health_data'] = self.closest_buckets(profile.result(),
+                                                                   fetched_info['temperature_C'],
+                                                                   fetched_info['altitude_m'])
         print("Closest health data found")
         formatted_info = self.format_scenario_info(fetched_info)
-        alert = self.llm_engine_2.run(f"""Based on the following scenario details and user health data, generate any necessary health alerts with severity and medical advice.
+        alert = self._timed(timings, "alert_generation", self.llm_engine_2.run, f"""Based on the following scenario details and user health data, generate any necessary health alerts with severity and medical advice.
 Health metrics analysis report:
 {formatted_info}
 
@@ -210,15 +272,18 @@ User is saying: {user_input}
         print("\n=== Health Alert ===")
         print(alert)
 
-        self.push_health_alert(user_id, alert)
-        
-        self.push_pharmacy_alert(user_id, fetched_info['lat'], fetched_info['lon'], alert['message'])
+        # Fire-and-forget: the response does not depend on the alert writes
+        self.executor.submit(self._push_alerts, user_id, lat, lon, alert, pharmacies, background_timings)
+
+        timings["total"] = round(time.perf_counter() - start, 3)
+        print("Stage timings (s):", timings)
 
         return {
-            "lat": fetched_info['lat'],
-            "lon": fetched_info['lon'],
+            "lat": lat,
+            "lon": lon,
             "scenario_details": formatted_info,
-            "health_alert": alert
+            "health_alert": alert,
+            "timings": timings
         }
     
 
@@ -1,11 +1,32 @@
-import requests
+from app.llms.utils.http_client import HTTP_CLIENT
 import os
 from PIL import Image  # <-- fix import here
 import base64
+import io
 import json
+import struct
+import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 
 
+BINARY_MIMETYPE = "application/octet-stream"
+NPY_MIMETYPE = "application/x-npy"
+
+
+def decode_embeddings(response):
+    """
+    Decode an embedding server response into a float32 numpy array of shape (rows, dim).
+    Handles the raw float32 (uint32 rows/dim header), .npy and JSON wire formats.
+    """
+    content_type = response.headers.get("Content-Type", "")
+    if content_type.startswith(BINARY_MIMETYPE):
+        rows, dim = struct.unpack_from("<II", response.content)
+        return np.frombuffer(response.content, dtype="<f4", offset=8).reshape(rows, dim)
+    if content_type.startswith(NPY_MIMETYPE):
+        return np.load(io.BytesIO(response.content), allow_pickle=False)
+    return np.asarray(response.json().get("embeddings", []), dtype=np.float32)
+
+
 class TasteAnalyzer:
     def __init__(self):
         # https://fsq-emb-server-20555262314.us-central1.run.app
@@ -44,8 +65,8 @@ class TasteAnalyzer:
         # Generate embeddings for each trait category
         self.trait_embeddings = {}
         for category, traits in traits_data.items():
-            openai_embeddings = self.get_text_embeddings(traits, model="openai")
-            clip_embeddings = self.get_text_embeddings(traits, model="clip")
+            openai_embeddings = self.get_text_embeddings(traits, model="openai", as_numpy=True).tolist()
+            clip_embeddings = self.get_text_embeddings(traits, model="clip", as_numpy=True).tolist()
             self.trait_embeddings[category] = {
                 "traits": traits,
                 "embeddings": {
@@ -57,7 +78,11 @@ class TasteAnalyzer:
         with open("app/data/trait-embeddings.json", "w") as f:
             json.dump(self.trait_embeddings, f, indent=2)
     
-    def get_image_embeddings(self, user_id):
+    def get_image_embeddings(self, user_id, as_numpy=False):
+        """
+        Embed all images uploaded by the user with CLIP.
+        With as_numpy=True the binary wire format is requested and a numpy array is returned.
+        """
         folder_path = f"tmp/images/{user_id}/"
         # Read all images from the folder
         image_files = [
@@ -76,33 +101,40 @@ class TasteAnalyzer:
                 images_base64.append(img_b64)
 
         # Send request to embedding service
-        response = requests.post(
+        response = HTTP_CLIENT.post(
             self.clip_img_emb_endpoint,
-            json={"images": images_base64}
+            json={"images": images_base64},
+            headers={"Accept": BINARY_MIMETYPE} if as_numpy else None
         )
 
         if response.status_code != 200:
             raise RuntimeError(f"Error from embedding service: {response.text}")
 
+        if as_numpy:
+            return decode_embeddings(response)
         return response.json().get("embeddings", [])
         
 
-    def get_text_embeddings(self, texts, model="openai"):
-        if model == "clip":
-            response = requests.post(self.clip_txt_emb_endpoint, json={"texts": texts})
-        else:
-            response = requests.post(self.openai_txt_emb_endpoint, json={"texts": texts})
-        if response.status_code == 200:
-            return response.json().get("embeddings", [])
-        else:
-            return []
+    def get_text_embeddings(self, texts, model="openai", as_numpy=False):
+        """
+        Embed texts with the CLIP or OpenAI endpoint of the embedding service.
+        With as_numpy=True the binary wire format is requested and a numpy array is returned.
+        """
+        endpoint = self.clip_txt_emb_endpoint if model == "clip" else self.openai_txt_emb_endpoint
+        headers = {"Accept": BINARY_MIMETYPE} if as_numpy else None
+        response = HTTP_CLIENT.post(endpoint, json={"texts": texts}, headers=headers)
+        if response.status_code != 200:
+            return np.empty((0, 0), dtype=np.float32) if as_numpy else []
+        if as_numpy:
+            return decode_embeddings(response)
+        return response.json().get("embeddings", [])
         
     def analyze_user_taste(self, user_id, text):
         # Assigns scores to each trait based on text and image embeddings
         # While doing img-text then consider clip embeddings 
         # While doing only text then consider openai embeddings
-        text_embedding = self.get_text_embeddings([text], model="openai")[0]
-        image_embeddings = self.get_image_embeddings(user_id)
+        text_embedding = self.get_text_embeddings([text], model="openai", as_numpy=True)[0]
+        image_embeddings = self.get_image_embeddings(user_id, as_numpy=True)
         
         trait_scores = {}
         for category, data in self.trait_embeddings.items():
@@ -116,7 +148,7 @@ class TasteAnalyzer:
             )[0]
             text_scores = {trait: float(score) for trait, score in zip(traits, text_similarities)}
             # Image-based scores using CLIP embeddings
-            if image_embeddings:
+            if len(image_embeddings):
                 img_similarities = cosine_similarity(
                     image_embeddings, clip_embeddings
                 )
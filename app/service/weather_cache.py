@@ -0,0 +1,105 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Returned by WeatherCache.get for a day known to have no data (see put_missing)
+MISSING = object()
+
+
+class WeatherCache:
+    """
+    TTL cache for daily weather values keyed by (grid cell, date).
+    An in-process LRU sits in front of an optional on-disk SQLite store; every
+    entry carries its own expiry so archive data can live much longer than forecasts.
+    Days the weather API had no value for are remembered in memory only, with a short
+    TTL, so repeated lookups do not refetch them.
+    Usage:
+        cache = WeatherCache("tmp/weather_cache.sqlite")
+        cache.put_many({"46.5:7.9:2024-07-01": 14.2}, ttl=3600)
+        cache.get("46.5:7.9:2024-07-01")
+    """
+
+    def __init__(self, path: str = None, max_memory_items: int = 10000):
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {"memory_hits": 0, "disk_hits": 0, "negative_hits": 0, "misses": 0, "expired": 0}
+
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS weather (key TEXT PRIMARY KEY, value REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Returns the cached value, MISSING if the day is known to have no data,
+        or None if it is not cached or expired.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self._metrics["negative_hits" if entry[0] is MISSING else "memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+                self._metrics["expired"] += 1
+
+            if self._conn is not None:
+                row = self._conn.execute("SELECT value, expires_at FROM weather WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[1] > now:
+                    self._remember(key, row[0], row[1])
+                    self._metrics["disk_hits"] += 1
+                    return row[0]
+
+            self._metrics["misses"] += 1
+            return None
+
+    def put_many(self, values, ttl):
+        """
+        Stores {key: value} in both tiers, expiring after ttl seconds.
+        """
+        expires_at = time.time() + ttl
+        with self._lock:
+            for key, value in values.items():
+                self._remember(key, value, expires_at)
+            if self._conn is not None and values:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO weather (key, value, expires_at) VALUES (?, ?, ?)",
+                    [(key, value, expires_at) for key, value in values.items()]
+                )
+                self._conn.execute("DELETE FROM weather WHERE expires_at <= ?", (time.time(),))
+                self._conn.commit()
+
+    def put_missing(self, keys, ttl):
+        """
+        Remembers (in memory only) that these keys have no value, for ttl seconds.
+        """
+        expires_at = time.time() + ttl
+        with self._lock:
+            for key in keys:
+                self._remember(key, MISSING, expires_at)
+
+    def stats(self):
+        with self._lock:
+            hits = self._metrics["memory_hits"] + self._metrics["disk_hits"] + self._metrics["negative_hits"]
+            total = hits + self._metrics["misses"]
+            return {
+                **self._metrics,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_items": len(self._memory),
+            }
@@ -0,0 +1,63 @@
+import re
+import zlib
+from collections import Counter
+from typing import Dict
+
+
+class BM25Embedder:
+    """
+    Callable class to generate sparse BM25 term-weight vectors without any model.
+    Tokens are hashed into the uint32 index space; IDF is left to Qdrant
+    (create the sparse vector with `modifier=models.Modifier.IDF`), so documents
+    only carry the saturated, length-normalised term frequency.
+    Usage:
+        embedder = BM25Embedder()
+        doc_vector = embedder("sample text")
+        query_vector = embedder.encode_query("sample")
+    """
+
+    TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+    # Accepts a list of texts as well as a single str
+    batch = True
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_length: float = 64.0):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length
+
+    def _tokenize(self, text: str):
+        return self.TOKEN_PATTERN.findall(text.lower())
+
+    @staticmethod
+    def _index(token: str) -> int:
+        return zlib.crc32(token.encode("utf-8"))
+
+    def _encode_document(self, text: str) -> Dict[int, float]:
+        tokens = self._tokenize(text)
+        length_norm = self.k1 * (1 - self.b + self.b * len(tokens) / self.avg_doc_length)
+        weights = {}
+        for token, tf in Counter(tokens).items():
+            index = self._index(token)
+            weights[index] = weights.get(index, 0.0) + tf * (self.k1 + 1) / (tf + length_norm)
+        return weights
+
+    def encode_query(self, text: str) -> Dict[int, float]:
+        """
+        Queries weight every distinct term equally; Qdrant applies IDF at search time.
+        """
+        return {self._index(token): 1.0 for token in set(self._tokenize(text))}
+
+    def __call__(self, text):
+        """
+        Accepts a string or a list of strings.
+        Returns a sparse dict for a single string, or a list of sparse dicts for a list of strings.
+        """
+        if isinstance(text, str):
+            return self._encode_document(text)
+        elif isinstance(text, list) and all(isinstance(t, str) for t in text):
+            return [self._encode_document(t) for t in text]
+        else:
+            raise TypeError("Input must be a string or a list of strings.")
+
+
+BM25_EMBEDDER = BM25Embedder()  # Initialize the embedder instance
@@ -0,0 +1,140 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache for embeddings keyed by (model, sha256(text)).
+    An in-process LRU sits in front of an optional on-disk SQLite store which
+    evicts least recently used vectors once it grows past `max_disk_bytes`.
+    Usage:
+        cache = EmbeddingCache("tmp/embedding_cache.sqlite")
+        vectors = cache.get_many("text-embedding-ada-002", ["sample"])
+    """
+
+    def __init__(self, path: str = None, max_memory_items: int = 10000, max_disk_bytes: int = 512 * 1024 * 1024):
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self._conn = None
+        self._disk_bytes = 0
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)")
+            self._conn.commit()
+            self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return f"{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts):
+        """
+        Returns a list aligned with `texts` holding a float32 vector for hits and None for misses.
+        Vectors are shared with the cache and read-only in both tiers; copy them before modifying.
+        """
+        keys = [self.make_key(model, text) for text in texts]
+        results = [None] * len(keys)
+        with self._lock:
+            disk_lookups = {}
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    results[i] = self._memory[key]
+                    self._metrics["memory_hits"] += 1
+                else:
+                    disk_lookups.setdefault(key, []).append(i)
+
+            if disk_lookups and self._conn is not None:
+                found = {}
+                lookup_keys = list(disk_lookups)
+                for start in range(0, len(lookup_keys), 500):
+                    chunk = lookup_keys[start:start + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    found.update({key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows})
+                if found:
+                    now = time.time()
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE key = ?", [(now, key) for key in found]
+                    )
+                    self._conn.commit()
+                for key, vector in found.items():
+                    self._remember(key, vector)
+                    for i in disk_lookups.pop(key):
+                        results[i] = vector
+                        self._metrics["disk_hits"] += 1
+
+            self._metrics["misses"] += sum(len(indices) for indices in disk_lookups.values())
+        return results
+
+    def put_many(self, model: str, texts, vectors):
+        """
+        Stores vectors for the given texts in both tiers.
+        """
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.make_key(model, text)
+                # Own copy, frozen like the frombuffer views of the disk tier, so callers cannot corrupt it
+                vector = np.array(vector, dtype=np.float32)
+                vector.setflags(write=False)
+                self._remember(key, vector)
+                blob = vector.tobytes()
+                rows.append((key, blob, len(blob), now))
+
+            if self._conn is not None and rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)", rows
+                )
+                self._conn.commit()
+                self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used rows until the disk tier fits in max_disk_bytes."""
+        while self._disk_bytes > self.max_disk_bytes:
+            excess = self._disk_bytes - self.max_disk_bytes
+            avg_size = self._conn.execute("SELECT AVG(size) FROM embeddings").fetchone()[0] or 1
+            count = max(1, int(excess / avg_size) + 1)
+            deleted = self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_access LIMIT ?)", (count,)
+            ).rowcount
+            self._conn.commit()
+            self._metrics["evictions"] += deleted
+            self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+            if deleted == 0:
+                break
+
+    def stats(self):
+        with self._lock:
+            hits = self._metrics["memory_hits"] + self._metrics["disk_hits"]
+            total = hits + self._metrics["misses"]
+            return {
+                **self._metrics,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
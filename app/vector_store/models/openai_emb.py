@@ -1,7 +1,11 @@
 import os
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from typing import Dict
 from dotenv import load_dotenv
+from .embedding_cache import EmbeddingCache
 load_dotenv()
 
 
@@ -18,30 +22,97 @@ class OpenAIEmbedder:
         vector = embedder("sample text")
     """
 
-    def __init__(self, model: str = "text-embedding-ada-002"):
+    # Accepts a list of texts as well as a single str
+    batch = True
+
+    def __init__(
+        self,
+        model: str = "text-embedding-ada-002",
+        cache: EmbeddingCache = None,
+        max_batch_size: int = 512,
+        max_batch_tokens: int = 100000,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+    ):
         import openai
         openai.api_key = os.environ.get("OPENAI_API_KEY")
         self.openai = openai
         self.model = model
+        if cache is None:
+            cache = EmbeddingCache(
+                path=os.getenv("EMBEDDING_CACHE_PATH", "tmp/embedding_cache.sqlite"),
+                max_memory_items=int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000")),
+                max_disk_bytes=int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512")) * 1024 * 1024
+            )
+        self.cache = cache
+        # Large inputs are split into count/token-bounded chunks sent concurrently
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_retries = max_retries
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
 
     def __call__(self, text):
         """
         Accepts a string or a list of strings.
         Returns a numpy array for a single string, or a list of numpy arrays for a list of strings.
+        Vectors are served from the embedding cache when possible; only misses hit the API.
         """
         if isinstance(text, str):
-            response = self.openai.embeddings.create(
-                model=self.model,
-                input=text
-            )
-            return np.array(response.data[0].embedding)
+            return self._embed([text])[0]
         elif isinstance(text, list) and all(isinstance(t, str) for t in text):
-            response = self.openai.embeddings.create(
-                model=self.model,
-                input=text
-            )
-            return [np.array(item.embedding) for item in response.data]
+            return self._embed(text)
         else:
             raise TypeError("Input must be a string or a list of strings.")
 
+    def _embed(self, texts):
+        vectors = self.cache.get_many(self.model, texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            fetched = self._fetch(missing)
+            self.cache.put_many(self.model, missing, fetched)
+            fetched = dict(zip(missing, fetched))
+            vectors = [fetched[t] if v is None else v for t, v in zip(texts, vectors)]
+        return vectors
+
+    def _fetch(self, texts):
+        """
+        Embed texts through the API in chunks, preserving input order.
+        """
+        chunks = self._make_chunks(texts)
+        if len(chunks) == 1:
+            return self._create_embeddings(chunks[0])
+        return [vector for vectors in self._executor.map(self._create_embeddings, chunks) for vector in vectors]
+
+    def _make_chunks(self, texts):
+        chunks, chunk, chunk_tokens = [], [], 0
+        for text in texts:
+            tokens = len(text) // 4 + 1  # rough estimate, avoids a tokenizer dependency
+            if chunk and (len(chunk) >= self.max_batch_size or chunk_tokens + tokens > self.max_batch_tokens):
+                chunks.append(chunk)
+                chunk, chunk_tokens = [], 0
+            chunk.append(text)
+            chunk_tokens += tokens
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _create_embeddings(self, texts):
+        """
+        Single API call for one chunk, retried with exponential backoff on rate limits.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.openai.embeddings.create(
+                    model=self.model,
+                    input=texts
+                )
+                return [np.array(item.embedding, dtype=np.float32) for item in sorted(response.data, key=lambda d: d.index)]
+            except self.openai.RateLimitError:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(min(2 ** attempt, 30) + random.uniform(0, 1))
+
+    def cache_stats(self):
+        return self.cache.stats()
+
 OPENAI_EMBEDDER = OpenAIEmbedder()  # Initialize the embedder instance
\ No newline at end of file
@@ -11,6 +11,9 @@
 #         sparse_vector = embedder("sample text")
 #     """
 
+#     # Accepts a list of texts as well as a single str
+#     batch = True
+
 #     def __init__(self, model_name: str = "naver/splade-cocondenser-ensembledistil"):
 #         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
 #         self.model = AutoModelForMaskedLM.from_pretrained(model_name)
@@ -1,12 +1,104 @@
 import uuid
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Union, List, Dict, Any
 import numpy as np
 from qdrant_client import QdrantClient, models
 
 
+def _payload_key(key: str) -> str:
+    # Filter keys refer to metadata fields unless they already name a top-level payload field
+    if key == "text" or key.startswith("metadata."):
+        return key
+    return f"metadata.{key}"
+
+
+def _build_condition(spec: Dict[str, Any]) -> models.FieldCondition:
+    key = _payload_key(spec["key"])
+    if "match" in spec:
+        value = spec["match"]
+        if isinstance(value, (list, tuple, set)):
+            return models.FieldCondition(key=key, match=models.MatchAny(any=list(value)))
+        return models.FieldCondition(key=key, match=models.MatchValue(value=value))
+    if "range" in spec:
+        return models.FieldCondition(key=key, range=models.Range(**spec["range"]))
+    if "geo_radius" in spec:
+        geo = spec["geo_radius"]
+        return models.FieldCondition(
+            key=key,
+            geo_radius=models.GeoRadius(
+                center=models.GeoPoint(lat=geo["lat"], lon=geo["lon"]),
+                radius=geo["radius_m"]
+            )
+        )
+    raise ValueError(f"Unsupported filter condition: {spec}")
+
+
+def build_filter(spec: Union[Dict[str, Any], List[Dict[str, Any]], None]) -> Union[models.Filter, None]:
+    """
+    Compile a declarative filter spec into a Qdrant `models.Filter`.
+
+    A spec is either a list of conditions (all must hold) or a dict with any of
+    "must", "should" and "must_not" lists. Each condition names a metadata `key` and one of:
+        {"key": "type", "match": "leisure"}                        # exact value
+        {"key": "tags", "match": ["hiking", "beach"]}              # any of
+        {"key": "price", "range": {"gte": 10, "lt": 50}}           # numeric range
+        {"key": "location", "geo_radius": {"lat": 27.9, "lon": 86.9, "radius_m": 500}}
+    """
+    if spec is None or isinstance(spec, models.Filter):
+        return spec
+    if isinstance(spec, list):
+        spec = {"must": spec}
+    clauses = {
+        clause: [_build_condition(condition) for condition in spec.get(clause, [])] or None
+        for clause in ("must", "should", "must_not")
+    }
+    if not any(clauses.values()):
+        return None
+    return models.Filter(**clauses)
+
+
+def merge_filters(filters: List[models.Filter]) -> Union[models.Filter, None]:
+    filters = [f for f in filters if f is not None]
+    if not filters:
+        return None
+    if len(filters) == 1:
+        return filters[0]
+    return models.Filter(must=filters)
+
+
+def build_search_params(spec: Union[Dict[str, Any], models.SearchParams, None]) -> Union[models.SearchParams, None]:
+    """
+    Compile per-query search options into `models.SearchParams`.
+    Supported keys: "hnsw_ef", "exact", and for quantized collections "rescore",
+    "oversampling" and "ignore_quantization".
+    """
+    if spec is None or isinstance(spec, models.SearchParams):
+        return spec
+    quantization = None
+    if any(key in spec for key in ("rescore", "oversampling", "ignore_quantization")):
+        quantization = models.QuantizationSearchParams(
+            ignore=spec.get("ignore_quantization", False),
+            rescore=spec.get("rescore", True),
+            oversampling=spec.get("oversampling")
+        )
+    return models.SearchParams(
+        hnsw_ef=spec.get("hnsw_ef"),
+        exact=spec.get("exact", False),
+        quantization=quantization
+    )
+
+
 class VectorEmbeddingStore:
     """
     Wrapper for Qdrant vector DB supporting dense (OpenAI) and sparse (SPLADE) embeddings.
+    With hybrid=True a single collection stores named "dense" and "sparse" vectors per point
+    (sparse defaults to the local BM25 encoder) and retrieval fuses both with server-side RRF.
+
+    Dense vectors can be stored quantized ("scalar" int8 or "binary") with the originals kept
+    on disk for rescoring; `on_disk_vectors`, `on_disk_payload`, `hnsw_m` and `hnsw_ef_construct`
+    tune the storage layout and index of newly created collections.
     """
 
     def __init__(
@@ -18,8 +110,32 @@ class VectorEmbeddingStore:
         distance_metric: str = "Cosine",
         retrieval_pipeline: List[Union[Callable, List[Any]]] = None,
         is_sparse: bool = False,
+        default_top_k: int = 100,
+        hybrid: bool = False,
+        sparse_embedder: Union[Callable[[str], Dict[int, float]], str] = "bm25",
+        quantization: str = None,
+        on_disk_vectors: bool = None,
+        on_disk_payload: bool = None,
+        hnsw_m: int = None,
+        hnsw_ef_construct: int = None,
+        search_params: Union[Dict[str, Any], models.SearchParams] = None,
     ):
         self.collection_name = collection_name
+        self.default_top_k = default_top_k
+        self.distance_metric = distance_metric
+        self.hybrid = hybrid
+
+        if quantization not in (None, "scalar", "binary"):
+            raise ValueError("Quantization must be None, 'scalar' or 'binary'.")
+        self.quantization = quantization
+        self.on_disk_vectors = on_disk_vectors
+        self.on_disk_payload = on_disk_payload
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+        if search_params is None and quantization is not None:
+            # Rescore quantized candidates with the original vectors by default
+            search_params = {"rescore": True, "oversampling": 2.0 if quantization == "binary" else 1.0}
+        self.search_params = build_search_params(search_params)
 
         if isinstance(embedder, str):
             if embedder.lower() == "openai":
@@ -38,49 +154,152 @@ class VectorEmbeddingStore:
         else:
             raise TypeError("Embedder must be a callable function or a string identifier.")
         
+        self.sparse_embedder = None
+        if hybrid:
+            if isinstance(sparse_embedder, str):
+                if sparse_embedder.lower() == "bm25":
+                    from .models.bm25_emb import BM25_EMBEDDER
+                    self.sparse_embedder = BM25_EMBEDDER
+                elif sparse_embedder.lower() == "splade":
+                    from .models.splade_emb import SPLADE_EMBEDDER
+                    self.sparse_embedder = SPLADE_EMBEDDER
+                else:
+                    raise ValueError("Sparse embedder must be 'bm25' or 'splade' or a callable function.")
+            elif callable(sparse_embedder):
+                self.sparse_embedder = sparse_embedder
+            else:
+                raise TypeError("Sparse embedder must be a callable function or a string identifier.")
+
         self.is_sparse = is_sparse
         self.retrieval_pipeline = retrieval_pipeline or []
         self.client = QdrantClient(url=host, api_key=api_key)
 
         if not self.client.collection_exists(collection_name):
-            sample_vector = self.embedder("sample")
-            if isinstance(sample_vector, np.ndarray):
-                # Dense vector store
-                dim = sample_vector.shape[0]
-                self.client.create_collection(
-                    collection_name=collection_name,
-                    vectors_config=models.VectorParams(size=dim, distance=models.Distance[distance_metric.upper()])
-                )
-            else:
-                # Sparse vector store
-                self.client.create_collection(
-                    collection_name=collection_name,
-                    vectors_config={},  # Required even if unused
-                    sparse_vectors_config={
-                        "text": models.SparseVectorParams()
-                    }
-                )
+            self._create_collection()
+
+    def _quantization_config(self):
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    def _hnsw_config(self):
+        if self.hnsw_m is None and self.hnsw_ef_construct is None:
+            return None
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def _create_collection(self):
+        sample_vector = self.embedder("sample")
+        distance = models.Distance[self.distance_metric.upper()]
+        if self.hybrid:
+            # Hybrid store: named dense + sparse vectors, IDF applied by Qdrant on the sparse side
+            self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config={
+                    "dense": models.VectorParams(size=len(sample_vector), distance=distance, on_disk=self.on_disk_vectors)
+                },
+                sparse_vectors_config={
+                    "sparse": models.SparseVectorParams(modifier=models.Modifier.IDF)
+                },
+                quantization_config=self._quantization_config(),
+                hnsw_config=self._hnsw_config(),
+                on_disk_payload=self.on_disk_payload
+            )
+        elif isinstance(sample_vector, np.ndarray):
+            # Dense vector store
+            dim = sample_vector.shape[0]
+            self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=models.VectorParams(size=dim, distance=distance, on_disk=self.on_disk_vectors),
+                quantization_config=self._quantization_config(),
+                hnsw_config=self._hnsw_config(),
+                on_disk_payload=self.on_disk_payload
+            )
+        else:
+            # Sparse vector store
+            self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config={},  # Required even if unused
+                sparse_vectors_config={
+                    "text": models.SparseVectorParams()
+                },
+                on_disk_payload=self.on_disk_payload
+            )
 
-    def _format_point(self, item: Dict[str, Any]) -> models.PointStruct:
-        vector = self.embedder(item['text'])
-        raw_id = item["id"]
+    @staticmethod
+    def _embed_many(embedder: Callable, texts: List[str]) -> List[Any]:
+        """
+        Embedders are Callable[[str], ...]; only those declaring `batch = True` (the built-in
+        OpenAI/BM25/SPLADE embedders) are handed the whole list in one call.
+        """
+        if getattr(embedder, "batch", False):
+            return embedder(texts)
+        return [embedder(text) for text in texts]
 
+    def _embed_texts(self, texts: List[str]) -> List[Any]:
+        """
+        Embed a batch of texts. Hybrid stores return {"dense": ..., "sparse": ...} per text.
+        """
+        dense_or_sparse = self._embed_many(self.embedder, texts)
+        if not self.hybrid:
+            return dense_or_sparse
+        sparse = self._embed_many(self.sparse_embedder, texts)
+        return [{"dense": d, "sparse": sp} for d, sp in zip(dense_or_sparse, sparse)]
+
+    def _embed_text(self, text: str) -> Any:
+        """
+        Embed a single text, calling the embedders with a str as their Callable[[str], ...] contract promises.
+        """
+        vector = self.embedder(text)
+        if not self.hybrid:
+            return vector
+        return {"dense": vector, "sparse": self.sparse_embedder(text)}
+
+    def _encode_sparse_query(self, query: str) -> Dict[int, float]:
+        if hasattr(self.sparse_embedder, "encode_query"):
+            return self.sparse_embedder.encode_query(query)
+        return self.sparse_embedder(query)
+
+    @staticmethod
+    def _point_id(raw_id: Union[str, int]) -> Union[str, int]:
         # Normalize ID
         if isinstance(raw_id, str):
             try:
-                point_id = str(uuid.UUID(raw_id))
+                return str(uuid.UUID(raw_id))
             except ValueError:
-                point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, raw_id))
+                return str(uuid.uuid5(uuid.NAMESPACE_DNS, raw_id))
         elif isinstance(raw_id, int):
-            point_id = raw_id
+            return raw_id
         else:
             raise ValueError("Point ID must be str or int")
 
-        if isinstance(vector, dict):  # Sparse vector
-            indices, values = zip(*vector.items()) if vector else ([], [])
+    @staticmethod
+    def _sparse_vector(vector: Dict[int, float]) -> models.SparseVector:
+        indices, values = zip(*vector.items()) if vector else ([], [])
+        return models.SparseVector(indices=list(indices), values=list(values))
+
+    def _format_point(self, item: Dict[str, Any], vector=None) -> models.PointStruct:
+        if vector is None:
+            vector = self._embed_text(item['text'])
+        point_id = self._point_id(item["id"])
+
+        if self.hybrid:  # Named dense + sparse vectors
+            dense = vector["dense"]
             return models.PointStruct(
                 id=point_id,
-                vector={"text": models.SparseVector(indices=list(indices), values=list(values))},
+                vector={
+                    "dense": dense.tolist() if isinstance(dense, np.ndarray) else dense,
+                    "sparse": self._sparse_vector(vector["sparse"])
+                },
+                payload={"text": item["text"], "metadata": item.get("metadata", {})}
+            )
+        elif isinstance(vector, dict):  # Sparse vector
+            return models.PointStruct(
+                id=point_id,
+                vector={"text": self._sparse_vector(vector)},
                 payload={"text": item["text"], "metadata": item.get("metadata", {})}
             )
         else:  # Dense vector
@@ -90,45 +309,131 @@ class VectorEmbeddingStore:
                 payload={"text": item["text"], "metadata": item.get("metadata", {})}
             )
 
+    def _format_batch(self, items: List[Dict[str, Any]], vectors) -> models.Batch:
+        """
+        Build one columnar Batch for a chunk of items. Dense vectors are stacked into a single
+        float32 matrix and converted in one call rather than one `.tolist()` per point.
+        """
+        ids = [self._point_id(item["id"]) for item in items]
+        payloads = [{"text": item["text"], "metadata": item.get("metadata", {})} for item in items]
+        if self.hybrid:  # Named dense + sparse vectors
+            batch_vectors = {
+                "dense": np.asarray([vector["dense"] for vector in vectors], dtype=np.float32).tolist(),
+                "sparse": [self._sparse_vector(vector["sparse"]) for vector in vectors]
+            }
+        elif len(vectors) and isinstance(vectors[0], dict):  # Sparse vectors
+            batch_vectors = {"text": [self._sparse_vector(vector) for vector in vectors]}
+        else:  # Dense vectors
+            batch_vectors = np.asarray(vectors, dtype=np.float32).tolist()
+        return models.Batch(ids=ids, vectors=batch_vectors, payloads=payloads)
+
     def insert(self, item: Dict[str, Any]):
         self.client.upsert(
             collection_name=self.collection_name,
             points=[self._format_point(item)]
         )
 
-    def inserts(self, items: List[Dict[str, Any]]):
-        points = [self._format_point(item) for item in items]
-        self.client.upsert(collection_name=self.collection_name, points=points)
+    def inserts(self, items: List[Dict[str, Any]], batch_size: int = 256, parallel: int = 4, wait: bool = False):
+        """
+        Bulk ingestion path.
+        Texts are embedded `batch_size` at a time (one embedder call per batch) and each batch is
+        upserted on a pool of `parallel` writers, so embedding the next batch overlaps with writing
+        the previous one. With wait=False Qdrant acknowledges writes before indexing them.
+        """
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            in_flight = deque()
+            for start in range(0, len(items), batch_size):
+                chunk = items[start:start + batch_size]
+                vectors = self._embed_texts([item['text'] for item in chunk])
+                in_flight.append(executor.submit(
+                    self.client.upsert,
+                    collection_name=self.collection_name,
+                    points=self._format_batch(chunk, vectors),
+                    wait=wait
+                ))
+                # Bound memory: never hold more than 2 batches per writer in flight
+                while len(in_flight) > 2 * parallel:
+                    in_flight.popleft().result()
+            for future in in_flight:
+                future.result()
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = None,
+        retrieval_pipeline=None,
+        query_filter: Union[Dict[str, Any], List[Dict[str, Any]], models.Filter] = None,
+        with_payload: Union[bool, List[str]] = True,
+        search_params: Union[Dict[str, Any], models.SearchParams] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve the `top_k` (default: `default_top_k`) closest points to `query`.
+
+        `query_filter` and any ["filter", spec] steps of the retrieval pipeline are compiled with
+        `build_filter` and evaluated by Qdrant. Callable steps are still applied in Python as a
+        fallback for predicates that cannot be expressed as a filter spec.
+        `with_payload` may be a list of payload fields to return, e.g. ["text", "metadata.type"].
+        Hybrid stores run dense and sparse prefetches in one request and fuse them with RRF.
+        `search_params` (see `build_search_params`) overrides the store default for this query.
+        """
+        pipeline = self.retrieval_pipeline if retrieval_pipeline is None else retrieval_pipeline
+        server_filter = merge_filters(
+            [build_filter(query_filter)] +
+            [build_filter(step[1]) for step in pipeline if isinstance(step, list) and step[0] == "filter"]
+        )
 
-    def retrieve(self, query: str, top_k: int = None, retrieval_pipeline=None) -> List[Dict[str, Any]]:
+        params = build_search_params(search_params) or self.search_params
         embedded_query = self.embedder(query)
         if top_k is None:
-            # Total number of items in the collection
-            top_k = self.client.count(
-                collection_name=self.collection_name,
-                exact=True
-            ).count
+            top_k = self.default_top_k
 
-        if isinstance(embedded_query, dict):
-            indices, values = zip(*embedded_query.items()) if embedded_query else ([], [])
+        if self.hybrid:
             result = self.client.query_points(
                 collection_name=self.collection_name,
-                query=models.SparseVector(indices=list(indices), values=list(values)),
+                prefetch=[
+                    models.Prefetch(
+                        query=embedded_query.tolist() if isinstance(embedded_query, np.ndarray) else embedded_query,
+                        using="dense",
+                        filter=server_filter,
+                        params=params,
+                        limit=2 * top_k
+                    ),
+                    models.Prefetch(
+                        query=self._sparse_vector(self._encode_sparse_query(query)),
+                        using="sparse",
+                        filter=server_filter,
+                        limit=2 * top_k
+                    ),
+                ],
+                query=models.FusionQuery(fusion=models.Fusion.RRF),
+                limit=top_k,
+                with_payload=with_payload
+            ).points
+        elif isinstance(embedded_query, dict):
+            result = self.client.query_points(
+                collection_name=self.collection_name,
+                query=self._sparse_vector(embedded_query),
                 using="text",
+                query_filter=server_filter,
+                search_params=params,
                 limit=top_k,
-                with_payload=True
+                with_payload=with_payload
             ).points
         else:
             result = self.client.query_points(
                 collection_name=self.collection_name,
                 query=embedded_query.tolist() if isinstance(embedded_query, np.ndarray) else embedded_query,
+                query_filter=server_filter,
+                search_params=params,
                 limit=top_k,
-                with_payload=True
+                with_payload=with_payload
             ).points
 
         items = [{"id": r.id, "score": r.score, **(r.payload or {})} for r in result]
 
-        for step in self.retrieval_pipeline if retrieval_pipeline is None else retrieval_pipeline:
+        for step in pipeline:
             if callable(step):
                 items = list(filter(step, items))
             elif isinstance(step, list) and step[0] == "search":
@@ -136,40 +441,87 @@ class VectorEmbeddingStore:
 
         return items
 
-    def delete(self, condition: Callable[[Dict], bool]):
-        all_points, _ = self.client.scroll(
-            collection_name=self.collection_name,
-            scroll_filter=None,
-            limit=10000
-        )
-
-        to_delete_ids = [
-            point.id for point in all_points
-            if condition({"id": point.id, **(point.payload or {})})
-        ]
-
-        if to_delete_ids:
-            self.client.delete(
+    def _scroll_pages(self, scroll_filter=None, page_size: int = 1000):
+        """
+        Yield pages of points, following `next_page_offset` until the collection is exhausted.
+        Only one page of payloads is held in memory at a time.
+        """
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
                 collection_name=self.collection_name,
-                points_selector=models.PointIdsList(points=to_delete_ids)
+                scroll_filter=scroll_filter,
+                limit=page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
             )
+            if points:
+                yield points
+            if offset is None:
+                break
 
-    def update(self, condition: Callable[[Dict], bool], update_func: Callable[[Dict], Dict]):
-        all_points, _ = self.client.scroll(
-            collection_name=self.collection_name,
-            scroll_filter=None,
-            limit=10000
-        )
+    def delete(
+        self,
+        condition: Callable[[Dict], bool] = None,
+        scroll_filter: Union[Dict[str, Any], List[Dict[str, Any]], models.Filter] = None,
+        page_size: int = 1000,
+        progress_callback: Callable[[int, int], None] = None,
+    ) -> int:
+        """
+        Delete points matching `scroll_filter` (evaluated by Qdrant, see `build_filter`)
+        and `condition` (evaluated in Python). Returns the number of deleted points.
+        `progress_callback(scanned, deleted)` is called after every page.
+        """
+        scroll_filter = build_filter(scroll_filter)
+        if condition is None and scroll_filter is None:
+            raise ValueError("Either condition or scroll_filter must be provided.")
 
-        updated_points = []
-        for point in all_points:
-            full_data = {"id": point.id, **(point.payload or {})}
-            if condition(full_data):
-                new_data = update_func(full_data)
-                updated_points.append(self._format_point(new_data))
+        scanned = deleted = 0
+        for points in self._scroll_pages(scroll_filter, page_size):
+            to_delete_ids = [
+                point.id for point in points
+                if condition is None or condition({"id": point.id, **(point.payload or {})})
+            ]
+            if to_delete_ids:
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=models.PointIdsList(points=to_delete_ids)
+                )
+            scanned += len(points)
+            deleted += len(to_delete_ids)
+            if progress_callback:
+                progress_callback(scanned, deleted)
+        return deleted
 
-        if updated_points:
-            self.client.upsert(collection_name=self.collection_name, points=updated_points)
+    def update(
+        self,
+        condition: Callable[[Dict], bool],
+        update_func: Callable[[Dict], Dict],
+        scroll_filter: Union[Dict[str, Any], List[Dict[str, Any]], models.Filter] = None,
+        page_size: int = 1000,
+        progress_callback: Callable[[int, int], None] = None,
+    ) -> int:
+        """
+        Apply `update_func` to every point matching `scroll_filter` and `condition`, re-embedding
+        each page through the batched ingestion path. Returns the number of updated points.
+        `progress_callback(scanned, updated)` is called after every page.
+        """
+        scroll_filter = build_filter(scroll_filter)
+        scanned = updated = 0
+        for points in self._scroll_pages(scroll_filter, page_size):
+            updated_items = []
+            for point in points:
+                full_data = {"id": point.id, **(point.payload or {})}
+                if condition is None or condition(full_data):
+                    updated_items.append(update_func(full_data))
+
+            self.inserts(updated_items, wait=True)
+            scanned += len(points)
+            updated += len(updated_items)
+            if progress_callback:
+                progress_callback(scanned, updated)
+        return updated
 
     def delete_collection(self):
         if self.client.collection_exists(self.collection_name):
@@ -177,19 +529,52 @@ class VectorEmbeddingStore:
 
     def reset_collection(self):
         self.delete_collection()
-        sample_vector = self.embedder("sample")
+        self._create_collection()
 
-        if isinstance(sample_vector, np.ndarray):
-            dim = sample_vector.shape[0]
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=models.VectorParams(size=dim, distance=models.Distance.COSINE)
-            )
-        else:
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config={},
-                sparse_vectors_config={
-                    "text": models.SparseVectorParams()
-                }
-            )
\ No newline at end of file
+    def search_quality_report(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        search_params: Union[Dict[str, Any], models.SearchParams] = None,
+    ) -> Dict[str, float]:
+        """
+        Measure recall@k and latency of approximate dense search (HNSW, plus quantization if
+        configured) against exact full-scan search on the original vectors for sample queries.
+        """
+        params = build_search_params(search_params) or self.search_params or models.SearchParams()
+        exact_params = models.SearchParams(
+            exact=True, quantization=models.QuantizationSearchParams(ignore=True)
+        )
+        using = "dense" if self.hybrid else None
+        query_vectors = self._embed_many(self.embedder, queries)
+
+        recalls, approx_ms, exact_ms = [], [], []
+        for vector in query_vectors:
+            vector = vector.tolist() if isinstance(vector, np.ndarray) else vector
+            timings = []
+            results = []
+            for query_params in (params, exact_params):
+                start = time.perf_counter()
+                points = self.client.query_points(
+                    collection_name=self.collection_name,
+                    query=vector,
+                    using=using,
+                    limit=top_k,
+                    search_params=query_params,
+                    with_payload=False
+                ).points
+                timings.append((time.perf_counter() - start) * 1000)
+                results.append({point.id for point in points})
+            approx_ms.append(timings[0])
+            exact_ms.append(timings[1])
+            recalls.append(len(results[0] & results[1]) / len(results[1]) if results[1] else 1.0)
+
+        return {
+            "queries": len(recalls),
+            "top_k": top_k,
+            "recall_at_k": float(np.mean(recalls)) if recalls else 0.0,
+            "approx_latency_ms_p50": float(np.percentile(approx_ms, 50)) if approx_ms else 0.0,
+            "approx_latency_ms_p95": float(np.percentile(approx_ms, 95)) if approx_ms else 0.0,
+            "exact_latency_ms_p50": float(np.percentile(exact_ms, 50)) if exact_ms else 0.0,
+            "exact_latency_ms_p95": float(np.percentile(exact_ms, 95)) if exact_ms else 0.0,
+        }
@@ -0,0 +1,134 @@
+"""
+Benchmark of the columnar health bucket statistics against the per-record loop they replaced.
+
+Usage:
+    python benchmarks/health_stats_benchmark.py --points 1000000 --loop-points 100000
+"""
+import os
+import time
+import argparse
+import importlib.util
+from collections import defaultdict
+import numpy as np
+
+# Load the module by path: importing the app package would start Flask, Mongo and the LLM clients
+_spec = importlib.util.spec_from_file_location(
+    "health_stats", os.path.join(os.path.dirname(__file__), "..", "app", "service", "health_stats.py")
+)
+health_stats = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(health_stats)
+
+
+def loop_bucket_stats(factors, metrics, bucket_sizes):
+    """
+    Per-record reference implementation (the previous HealthDataHandler loop), kept for benchmarking.
+    """
+    factor_buckets = {factor: defaultdict(lambda: defaultdict(list)) for factor in bucket_sizes}
+    n = len(next(iter(metrics.values())))
+    for i in range(n):
+        for factor, bucket_size in bucket_sizes.items():
+            value = factors[factor][i]
+            if np.isnan(value):
+                continue
+            bucket = int(np.floor(value / bucket_size) * bucket_size)
+            for metric, values in metrics.items():
+                if not np.isnan(values[i]):
+                    factor_buckets[factor][bucket][metric].append(values[i])
+
+    results = {}
+    for factor, buckets in factor_buckets.items():
+        results[factor] = {}
+        for bucket, bucket_metrics in buckets.items():
+            results[factor][bucket] = {}
+            for metric in metrics:
+                values = bucket_metrics.get(metric)
+                arr = np.array(values) if values else None
+                results[factor][bucket][f"{metric}_stats"] = {
+                    "mean": float(np.mean(arr)),
+                    "max": float(np.max(arr)),
+                    "min": float(np.min(arr)),
+                    "var": float(np.var(arr))
+                } if values else None
+    return results
+
+
+def synthetic_columns(n_points, seed=0):
+    """
+    Random factor/metric columns shaped like simulated trekking data, with a few missing metrics.
+    """
+    rng = np.random.default_rng(seed)
+    factors = {
+        "temperature": rng.normal(22, 8, n_points),
+        "altitude": rng.uniform(0, 3000, n_points),
+        "speed_xy": np.abs(rng.normal(1.4, 0.8, n_points)),
+        "speed_z": np.abs(rng.normal(0, 0.3, n_points)),
+    }
+    metrics = {
+        "heart_rate": rng.normal(100, 20, n_points),
+        "calories_burned": rng.normal(8, 3, n_points),
+        "o2_saturation": rng.normal(96, 2, n_points),
+    }
+    metrics["o2_saturation"][rng.random(n_points) < 0.05] = np.nan
+    return factors, metrics
+
+
+def _results_match(expected, actual):
+    if expected.keys() != actual.keys():
+        return False
+    for factor in expected:
+        if expected[factor].keys() != actual[factor].keys():
+            return False
+        for bucket, bucket_values in expected[factor].items():
+            for key, stats in bucket_values.items():
+                other = actual[factor][bucket][key]
+                if (stats is None) != (other is None):
+                    return False
+                if stats and not all(np.isclose(stats[k], other[k]) for k in stats):
+                    return False
+    return True
+
+
+def benchmark(n_points=1_000_000, loop_points=None, seed=0):
+    """
+    Times bucket_stats on n_points and the per-record loop on loop_points (defaults to n_points),
+    checks both agree, and returns the timings in seconds.
+    """
+    bucket_sizes = health_stats.BUCKET_SIZES
+
+    factors, metrics = synthetic_columns(n_points, seed)
+    start = time.perf_counter()
+    health_stats.bucket_stats(factors, metrics, bucket_sizes)
+    vectorized_seconds = time.perf_counter() - start
+
+    loop_points = min(loop_points or n_points, n_points)
+    loop_factors = {name: values[:loop_points] for name, values in factors.items()}
+    loop_metrics = {name: values[:loop_points] for name, values in metrics.items()}
+    start = time.perf_counter()
+    reference = loop_bucket_stats(loop_factors, loop_metrics, bucket_sizes)
+    loop_seconds = time.perf_counter() - start
+
+    return {
+        "points": n_points,
+        "vectorized_seconds": vectorized_seconds,
+        "loop_points": loop_points,
+        "loop_seconds": loop_seconds,
+        "loop_seconds_per_million": loop_seconds * 1_000_000 / loop_points,
+        "match": _results_match(reference, health_stats.bucket_stats(loop_factors, loop_metrics, bucket_sizes)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark columnar vs per-record health bucket statistics.")
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--loop-points", type=int, default=100_000, help="Points for the (slow) per-record loop.")
+    args = parser.parse_args()
+
+    report = benchmark(args.points, args.loop_points)
+    print(f"bucket_stats:      {report['points']:>9} points in {report['vectorized_seconds']:.3f}s")
+    print(f"per-record loop:   {report['loop_points']:>9} points in {report['loop_seconds']:.3f}s "
+          f"(~{report['loop_seconds_per_million']:.1f}s per million)")
+    print(f"results match:     {report['match']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from transformers import CLIPProcessor, CLIPModel
 import torch
 from PIL import Image
@@ -7,6 +7,15 @@ import base64
 import openai
 
 import os
+import time
+import struct
+import sqlite3
+import hashlib
+import threading
+import queue
+from collections import Counter, OrderedDict
+import random
+from concurrent.futures import Future, ThreadPoolExecutor
 import numpy as np
 from typing import Dict
 from dotenv import load_dotenv
@@ -27,6 +36,7 @@ class CLIPEmbedder:
     def embed_texts(self, texts): 
         """
         Generate embeddings for a list of texts.
+        Returns a float32 numpy array of shape (len(texts), dim).
         """
         if isinstance(texts, str):
             texts = [texts]
@@ -36,25 +46,268 @@ class CLIPEmbedder:
         with torch.no_grad():
             embeddings = self.model.get_text_features(**inputs)
 
-        return embeddings.cpu().tolist()
+        return embeddings.cpu().numpy().astype(np.float32, copy=False)
+
+    @staticmethod
+    def decode_image(img):
+        """
+        Decode a base64 string into an RGB PIL Image; PIL Images are returned as is.
+        Raises on data that is not a valid image.
+        """
+        if isinstance(img, str):  # assume base64
+            img = Image.open(io.BytesIO(base64.b64decode(img))).convert("RGB")
+        return img
 
     def embed_images(self, images):
         """
         Generate embeddings for a list of images.
         Images can be base64 strings or PIL Images.
+        Returns a float32 numpy array of shape (len(images), dim).
         """
-        processed_images = []
-        for img in images:
-            if isinstance(img, str):  # assume base64
-                img = Image.open(io.BytesIO(base64.b64decode(img))).convert("RGB")
-            processed_images.append(img)
+        processed_images = [self.decode_image(img) for img in images]
 
         inputs = self.processor(images=processed_images, return_tensors="pt").to(self.device)
 
         with torch.no_grad():
             embeddings = self.model.get_image_features(**inputs)
 
-        return embeddings.cpu().tolist()
+        return embeddings.cpu().numpy().astype(np.float32, copy=False)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent embedding requests into a single forward pass.
+
+    Requests are queued and a background worker collects them until either
+    `max_batch_size` items are pending or `max_wait_ms` has elapsed since the
+    first one arrived. The combined batch is passed to `batch_fn` and the
+    results are scattered back to each caller in order. If the combined
+    batch fails, each request is retried on its own so one bad input only
+    fails its own caller.
+
+    Lower `max_wait_ms` favours latency, higher values favour throughput.
+    """
+
+    def __init__(self, batch_fn, max_batch_size: int = 32, max_wait_ms: float = 10.0):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._num_requests = 0
+        self._num_batches = 0
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, items):
+        """
+        Queue a list of items and block until their embeddings are ready.
+        """
+        if not isinstance(items, list):
+            items = [items]
+        future = Future()
+        self._queue.put((items, future))
+        return future.result()
+
+    def _collect(self):
+        first = self._queue.get()
+        pending = [first]
+        num_items = len(first[0])
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+        while num_items < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            pending.append(request)
+            num_items += len(request[0])
+        return pending, num_items
+
+    def _run(self):
+        while True:
+            pending, num_items = self._collect()
+            batch = [item for items, _ in pending for item in items]
+            try:
+                embeddings = self.batch_fn(batch)
+            except Exception as e:
+                if len(pending) == 1:
+                    pending[0][1].set_exception(e)
+                else:
+                    self._run_individually(pending)
+                continue
+
+            with self._lock:
+                self._batch_sizes[num_items] += 1
+                self._num_requests += len(pending)
+                self._num_batches += 1
+
+            start = 0
+            for items, future in pending:
+                future.set_result(embeddings[start:start + len(items)])
+                start += len(items)
+
+    def _run_individually(self, pending):
+        for items, future in pending:
+            try:
+                embeddings = self.batch_fn(items)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            with self._lock:
+                self._batch_sizes[len(items)] += 1
+                self._num_requests += 1
+                self._num_batches += 1
+            future.set_result(embeddings)
+
+    def stats(self):
+        """
+        Returns request/batch counters and the batch size distribution.
+        """
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "num_requests": self._num_requests,
+                "num_batches": self._num_batches,
+                "batch_size_distribution": {str(k): v for k, v in sorted(self._batch_sizes.items())},
+            }
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache for embeddings keyed by (model, sha256(text)).
+    An in-process LRU sits in front of an optional on-disk SQLite store which
+    evicts least recently used vectors once it grows past `max_disk_bytes`.
+    Usage:
+        cache = EmbeddingCache("tmp/embedding_cache.sqlite")
+        vectors = cache.get_many("text-embedding-ada-002", ["sample"])
+    """
+
+    def __init__(self, path: str = None, max_memory_items: int = 10000, max_disk_bytes: int = 512 * 1024 * 1024):
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self._conn = None
+        self._disk_bytes = 0
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)")
+            self._conn.commit()
+            self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return f"{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts):
+        """
+        Returns a list aligned with `texts` holding a float32 vector for hits and None for misses.
+        Vectors are shared with the cache and read-only in both tiers; copy them before modifying.
+        """
+        keys = [self.make_key(model, text) for text in texts]
+        results = [None] * len(keys)
+        with self._lock:
+            disk_lookups = {}
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    results[i] = self._memory[key]
+                    self._metrics["memory_hits"] += 1
+                else:
+                    disk_lookups.setdefault(key, []).append(i)
+
+            if disk_lookups and self._conn is not None:
+                found = {}
+                lookup_keys = list(disk_lookups)
+                for start in range(0, len(lookup_keys), 500):
+                    chunk = lookup_keys[start:start + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    found.update({key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows})
+                if found:
+                    now = time.time()
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE key = ?", [(now, key) for key in found]
+                    )
+                    self._conn.commit()
+                for key, vector in found.items():
+                    self._remember(key, vector)
+                    for i in disk_lookups.pop(key):
+                        results[i] = vector
+                        self._metrics["disk_hits"] += 1
+
+            self._metrics["misses"] += sum(len(indices) for indices in disk_lookups.values())
+        return results
+
+    def put_many(self, model: str, texts, vectors):
+        """
+        Stores vectors for the given texts in both tiers.
+        """
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.make_key(model, text)
+                # Own copy, frozen like the frombuffer views of the disk tier, so callers cannot corrupt it
+                vector = np.array(vector, dtype=np.float32)
+                vector.setflags(write=False)
+                self._remember(key, vector)
+                blob = vector.tobytes()
+                rows.append((key, blob, len(blob), now))
+
+            if self._conn is not None and rows:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)", rows
+                )
+                self._conn.commit()
+                self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used rows until the disk tier fits in max_disk_bytes."""
+        while self._disk_bytes > self.max_disk_bytes:
+            excess = self._disk_bytes - self.max_disk_bytes
+            avg_size = self._conn.execute("SELECT AVG(size) FROM embeddings").fetchone()[0] or 1
+            count = max(1, int(excess / avg_size) + 1)
+            deleted = self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_access LIMIT ?)", (count,)
+            ).rowcount
+            self._conn.commit()
+            self._metrics["evictions"] += deleted
+            self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+            if deleted == 0:
+                break
+
+    def stats(self):
+        with self._lock:
+            hits = self._metrics["memory_hits"] + self._metrics["disk_hits"]
+            total = hits + self._metrics["misses"]
+            return {
+                **self._metrics,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
 
 
 # Check if OPENAI_API_KEY is set
@@ -70,38 +323,138 @@ class OpenAIEmbedder:
         vector = embedder("sample text")
     """
 
-    def __init__(self, model: str = "text-embedding-ada-002"):
+    def __init__(
+        self,
+        model: str = "text-embedding-ada-002",
+        cache: EmbeddingCache = None,
+        max_batch_size: int = 512,
+        max_batch_tokens: int = 100000,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+    ):
         openai.api_key = os.environ.get("OPENAI_API_KEY")
         self.openai = openai
         self.model = model
+        if cache is None:
+            cache = EmbeddingCache(
+                path=os.getenv("EMBEDDING_CACHE_PATH", "tmp/embedding_cache.sqlite"),
+                max_memory_items=int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000")),
+                max_disk_bytes=int(os.getenv("EMBEDDING_CACHE_MAX_MB", "512")) * 1024 * 1024
+            )
+        self.cache = cache
+        # Large inputs are split into count/token-bounded chunks sent concurrently
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_retries = max_retries
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
 
     def __call__(self, text):
         """
         Accepts a string or a list of strings.
         Returns a numpy array for a single string, or a list of numpy arrays for a list of strings.
+        Vectors are served from the embedding cache when possible; only misses hit the API.
         """
         if isinstance(text, str):
-            response = self.openai.embeddings.create(
-                model=self.model,
-                input=text
-            )
-            return np.array(response.data[0].embedding)
+            return self._embed([text])[0]
         elif isinstance(text, list) and all(isinstance(t, str) for t in text):
-            response = self.openai.embeddings.create(
-                model=self.model,
-                input=text
-            )
-            return [np.array(item.embedding) for item in response.data]
+            return self._embed(text)
         else:
             raise TypeError("Input must be a string or a list of strings.")
 
+    def _embed(self, texts):
+        vectors = self.cache.get_many(self.model, texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if missing:
+            fetched = self._fetch(missing)
+            self.cache.put_many(self.model, missing, fetched)
+            fetched = dict(zip(missing, fetched))
+            vectors = [fetched[t] if v is None else v for t, v in zip(texts, vectors)]
+        return vectors
+
+    def _fetch(self, texts):
+        """
+        Embed texts through the API in chunks, preserving input order.
+        """
+        chunks = self._make_chunks(texts)
+        if len(chunks) == 1:
+            return self._create_embeddings(chunks[0])
+        return [vector for vectors in self._executor.map(self._create_embeddings, chunks) for vector in vectors]
+
+    def _make_chunks(self, texts):
+        chunks, chunk, chunk_tokens = [], [], 0
+        for text in texts:
+            tokens = len(text) // 4 + 1  # rough estimate, avoids a tokenizer dependency
+            if chunk and (len(chunk) >= self.max_batch_size or chunk_tokens + tokens > self.max_batch_tokens):
+                chunks.append(chunk)
+                chunk, chunk_tokens = [], 0
+            chunk.append(text)
+            chunk_tokens += tokens
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _create_embeddings(self, texts):
+        """
+        Single API call for one chunk, retried with exponential backoff on rate limits.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.openai.embeddings.create(
+                    model=self.model,
+                    input=texts
+                )
+                return [np.array(item.embedding, dtype=np.float32) for item in sorted(response.data, key=lambda d: d.index)]
+            except self.openai.RateLimitError:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(min(2 ** attempt, 30) + random.uniform(0, 1))
+
+    def cache_stats(self):
+        return self.cache.stats()
+
 
 # Initialize
 CLIP_EMBEDDER = CLIPEmbedder()
+# Micro-batching knobs: a longer wait window yields bigger batches at the cost of latency
+CLIP_BATCH_MAX_SIZE = int(os.getenv("CLIP_BATCH_MAX_SIZE", "32"))
+CLIP_BATCH_MAX_WAIT_MS = float(os.getenv("CLIP_BATCH_MAX_WAIT_MS", "10"))
+CLIP_TEXT_BATCHER = MicroBatcher(CLIP_EMBEDDER.embed_texts, CLIP_BATCH_MAX_SIZE, CLIP_BATCH_MAX_WAIT_MS)
+CLIP_IMAGE_BATCHER = MicroBatcher(CLIP_EMBEDDER.embed_images, CLIP_BATCH_MAX_SIZE, CLIP_BATCH_MAX_WAIT_MS)
 OPENAI_EMBEDDER = OpenAIEmbedder()  # Initialize the embedder instance
 app = Flask(__name__)
 
 
+# Wire formats for embedding responses, negotiated via the Accept header.
+# application/octet-stream: little-endian uint32 (rows, dim) header followed by raw float32 data.
+# application/x-npy: a single float32 array in NumPy .npy format.
+# JSON stays the default for clients that do not ask for anything else.
+JSON_MIMETYPE = "application/json"
+BINARY_MIMETYPE = "application/octet-stream"
+NPY_MIMETYPE = "application/x-npy"
+
+
+def embeddings_response(embeddings):
+    """
+    Serialize embeddings in the format requested by the client.
+    """
+    mimetype = request.accept_mimetypes.best_match([JSON_MIMETYPE, BINARY_MIMETYPE, NPY_MIMETYPE], default=JSON_MIMETYPE)
+    if mimetype == JSON_MIMETYPE:
+        if isinstance(embeddings, np.ndarray):
+            embeddings = embeddings.tolist()
+        else:
+            embeddings = [emb.tolist() for emb in embeddings]
+        return jsonify({"embeddings": embeddings})
+
+    array = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    if mimetype == NPY_MIMETYPE:
+        buffer = io.BytesIO()
+        np.save(buffer, array, allow_pickle=False)
+        return Response(buffer.getvalue(), mimetype=NPY_MIMETYPE)
+
+    header = struct.pack("<II", *array.shape)
+    return Response(header + np.ascontiguousarray(array, dtype="<f4").tobytes(), mimetype=BINARY_MIMETYPE)
+
+
 @app.route("/", methods=["GET"])
 def index():
     return jsonify({"message": "Embedding Server is running!"})
@@ -119,9 +472,11 @@ def embed_texts():
 
     if not texts:
         return jsonify({"error": "No texts provided"}), 400
+    if not all(isinstance(text, str) for text in (texts if isinstance(texts, list) else [texts])):
+        return jsonify({"error": "Texts must be strings"}), 400
 
-    embeddings = CLIP_EMBEDDER.embed_texts(texts)
-    return jsonify({"embeddings": embeddings})
+    embeddings = CLIP_TEXT_BATCHER.submit(texts)
+    return embeddings_response(embeddings)
 
 
 @app.route("/clip/embed-images", methods=["POST"])
@@ -132,8 +487,22 @@ def embed_images():
     if not images:
         return jsonify({"error": "No images provided"}), 400
 
-    embeddings = CLIP_EMBEDDER.embed_images(images)
-    return jsonify({"embeddings": embeddings})
+    # Decode here, in the request thread, so the batcher only runs the model and a bad image is a 400
+    try:
+        images = [CLIPEmbedder.decode_image(img) for img in (images if isinstance(images, list) else [images])]
+    except Exception as e:
+        return jsonify({"error": f"Invalid image: {e}"}), 400
+
+    embeddings = CLIP_IMAGE_BATCHER.submit(images)
+    return embeddings_response(embeddings)
+
+
+@app.route("/clip/batch-stats", methods=["GET"])
+def batch_stats():
+    return jsonify({
+        "texts": CLIP_TEXT_BATCHER.stats(),
+        "images": CLIP_IMAGE_BATCHER.stats()
+    })
 
 # OpenAI Embedder Endpoint
 @app.route("/openai/", methods=["GET"])
@@ -149,13 +518,12 @@ def openai_embed():
         return jsonify({"error": "No texts provided"}), 400
 
     embeddings = OPENAI_EMBEDDER(texts)
-    # Convert numpy arrays to lists for JSON serialization
-    if isinstance(embeddings, np.ndarray):
-        embeddings = embeddings.tolist()
-    else:
-        embeddings = [emb.tolist() for emb in embeddings]
+    return embeddings_response(embeddings)
+
 
-    return jsonify({"embeddings": embeddings})  
+@app.route("/openai/cache-stats", methods=["GET"])
+def openai_cache_stats():
+    return jsonify(OPENAI_EMBEDDER.cache_stats())
 
 
 
@@ -0,0 +1,14 @@
+import os
+import importlib.util
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def load_module(name, relative_path):
+    """
+    Load a module by path: importing the app package would start Flask, Mongo and the LLM clients.
+    """
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
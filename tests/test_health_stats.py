@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from helpers import load_module
+
+health_stats = load_module("health_stats", "app/service/health_stats.py")
+benchmark = load_module("health_stats_benchmark", "benchmarks/health_stats_benchmark.py")
+
+BUCKET_SIZES = health_stats.BUCKET_SIZES
+METRICS = health_stats.METRICS
+
+
+def _columns(n, fill=np.nan):
+    factors = {factor: np.full(n, fill) for factor in BUCKET_SIZES}
+    metrics = {metric: np.full(n, fill) for metric in METRICS}
+    return factors, metrics
+
+
+def _assert_matches_loop(factors, metrics, bucket_sizes=BUCKET_SIZES):
+    expected = benchmark.loop_bucket_stats(factors, metrics, bucket_sizes)
+    actual = health_stats.bucket_stats(factors, metrics, bucket_sizes)
+    assert benchmark._results_match(expected, actual)
+    return actual
+
+
+def test_empty_columns():
+    factors, metrics = _columns(0)
+    assert health_stats.bucket_stats(factors, metrics, BUCKET_SIZES) == {factor: {} for factor in BUCKET_SIZES}
+
+
+def test_all_nan_factors_produce_no_buckets():
+    factors, metrics = _columns(5)
+    metrics["heart_rate"][:] = 90.0
+    result = _assert_matches_loop(factors, metrics)
+    assert all(buckets == {} for buckets in result.values())
+
+
+def test_missing_metric_in_bucket_is_none():
+    factors, metrics = _columns(3)
+    factors["temperature"][:] = [1.0, 2.0, 7.0]
+    metrics["heart_rate"][:] = [80.0, 100.0, 120.0]
+    metrics["o2_saturation"][:] = [np.nan, np.nan, 97.0]
+    result = _assert_matches_loop(factors, metrics)
+    assert result["temperature"][0]["o2_saturation_stats"] is None
+    assert result["temperature"][0]["heart_rate_stats"] == pytest.approx(
+        {"mean": 90.0, "max": 100.0, "min": 80.0, "var": 100.0}
+    )
+    assert result["temperature"][5]["o2_saturation_stats"]["mean"] == pytest.approx(97.0)
+
+
+def test_negative_values_and_bucket_boundaries():
+    factors, metrics = _columns(6)
+    factors["temperature"][:] = [-10.0, -5.0, -0.1, 0.0, 4.999, 5.0]
+    factors["speed_z"][:] = [-1.4, -0.7, 0.0, 0.7, 1.4, 2.1]
+    for metric in METRICS:
+        metrics[metric][:] = np.arange(6, dtype=float)
+    result = _assert_matches_loop(factors, metrics)
+    assert sorted(result["temperature"]) == [-10, -5, 0, 5]
+
+
+def test_single_point_and_sparse_buckets():
+    factors, metrics = _columns(2)
+    factors["altitude"][:] = [0.0, 5000.0]
+    metrics["calories_burned"][:] = [3.0, 4.0]
+    result = _assert_matches_loop(factors, metrics)
+    assert sorted(result["altitude"]) == [0, 5000]
+    assert result["altitude"][5000]["calories_burned_stats"]["var"] == 0.0
+
+
+def test_random_columns_match_loop():
+    factors, metrics = benchmark.synthetic_columns(2000, seed=1)
+    factors["altitude"][::7] = np.nan
+    _assert_matches_loop(factors, metrics)
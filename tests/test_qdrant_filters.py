@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("qdrant_client")
+
+from qdrant_client import models
+
+from helpers import load_module
+
+qdrant_store = load_module("qdrant_store", "app/vector_store/qdrant_store.py")
+build_filter = qdrant_store.build_filter
+merge_filters = qdrant_store.merge_filters
+
+
+def test_empty_specs_build_no_filter():
+    assert build_filter(None) is None
+    assert build_filter([]) is None
+    assert build_filter({"must": [], "should": []}) is None
+
+
+def test_list_spec_means_all_must_hold():
+    result = build_filter([{"key": "type", "match": "leisure"}, {"key": "price", "range": {"gte": 10, "lt": 50}}])
+    assert result.should is None and result.must_not is None
+    match, price = result.must
+    assert match == models.FieldCondition(key="metadata.type", match=models.MatchValue(value="leisure"))
+    assert price == models.FieldCondition(key="metadata.price", range=models.Range(gte=10, lt=50))
+
+
+def test_clauses_and_condition_kinds():
+    result = build_filter({
+        "should": [{"key": "tags", "match": ["hiking", "beach"]}],
+        "must_not": [{"key": "location", "geo_radius": {"lat": 27.9, "lon": 86.9, "radius_m": 500}}],
+    })
+    assert result.must is None
+    assert result.should == [models.FieldCondition(key="metadata.tags", match=models.MatchAny(any=["hiking", "beach"]))]
+    assert result.must_not == [models.FieldCondition(
+        key="metadata.location",
+        geo_radius=models.GeoRadius(center=models.GeoPoint(lat=27.9, lon=86.9), radius=500)
+    )]
+
+
+def test_top_level_and_prefixed_keys_are_kept():
+    result = build_filter([{"key": "text", "match": "x"}, {"key": "metadata.city", "match": "Kathmandu"}])
+    assert [condition.key for condition in result.must] == ["text", "metadata.city"]
+
+
+def test_filters_pass_through_and_bad_conditions_raise():
+    existing = models.Filter(must=[models.FieldCondition(key="metadata.a", match=models.MatchValue(value=1))])
+    assert build_filter(existing) is existing
+    with pytest.raises(ValueError):
+        build_filter([{"key": "a", "near": 3}])
+
+
+def test_merge_filters():
+    first = build_filter([{"key": "a", "match": 1}])
+    second = build_filter([{"key": "b", "match": 2}])
+    assert merge_filters([]) is None
+    assert merge_filters([None, None]) is None
+    assert merge_filters([None, first]) is first
+    assert merge_filters([first, None, second]) == models.Filter(must=[first, second])
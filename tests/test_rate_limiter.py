@@ -0,0 +1,73 @@
+import pytest
+
+from helpers import load_module
+
+rate_limiter = load_module("rate_limiter", "app/llms/utils/rate_limiter.py")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limiter.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_full_bucket_serves_capacity_without_waiting(clock):
+    bucket = rate_limiter.TokenBucket(60)
+    assert [bucket.reserve() for _ in range(60)] == [0.0] * 60
+    # 60 per minute refills one token per second
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(2.0)
+
+
+def test_refill_is_continuous_and_capped(clock):
+    bucket = rate_limiter.TokenBucket(60, capacity=10)
+    bucket.reserve(10)
+    clock.now += 4
+    assert bucket.reserve(4) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+    clock.now += 3600
+    assert bucket.reserve(10) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_request_larger_than_capacity_waits_for_a_full_bucket(clock):
+    bucket = rate_limiter.TokenBucket(60, capacity=10)
+    assert bucket.reserve(100) == 0.0
+    assert bucket.reserve(100) == pytest.approx(10.0)
+
+
+def test_limit_sleeps_for_the_reserved_delay(clock):
+    limiter = rate_limiter.RateLimiter(rpm=60, tpm=600, max_concurrency=1)
+    with limiter.limit(tokens=600):
+        pass
+    with limiter.limit(tokens=60):
+        pass
+    # The token bucket is empty, so the second call waits 60 tokens / 10 per second
+    assert clock.slept == [pytest.approx(6.0)]
+    assert limiter.stats() == {"requests": 2, "throttled_seconds": pytest.approx(6.0)}
+    # The concurrency slot was released on exit
+    assert limiter._slots.acquire(blocking=False)
+
+
+def test_backoff_prefers_retry_after():
+    assert rate_limiter.backoff_delay(5, retry_after=2.5) == 2.5
+    assert 0 <= rate_limiter.backoff_delay(10, base=1.0, cap=4.0) <= 4.0
+    assert rate_limiter.retry_after_seconds({"Retry-After": "3"}) == 3.0
+    assert rate_limiter.retry_after_seconds({"Retry-After": "soon"}) is None
+    assert rate_limiter.retry_after_seconds({}) is None
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from helpers import load_module
+
+response_cache = load_module("response_cache", "app/llms/utils/response_cache.py")
+ResponseCache = response_cache.ResponseCache
+
+NAMESPACE = ResponseCache.namespace("gpt-4o-mini", "system", {"type": "object"}, 0.2)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "time", clock.time)
+    return clock
+
+
+def topic_embedder(texts):
+    """Queries mentioning the same topic word embed to (nearly) the same direction."""
+    topics = ("weather", "pharmacy", "trail")
+    vectors = []
+    for text in texts:
+        vector = np.array([1.0 if topic in text else 0.0 for topic in topics] + [0.1])
+        vectors.append(vector)
+    return vectors
+
+
+def test_exact_hit_returns_a_copy(clock):
+    cache = ResponseCache()
+    cache.put(NAMESPACE, "Is it  RAINY?", {"answer": ["yes"]})
+    first = cache.get(NAMESPACE, "is it rainy?")
+    first["answer"].append("mutated")
+    assert cache.get(NAMESPACE, "is it rainy?") == {"answer": ["yes"]}
+    assert cache.get("other-namespace", "is it rainy?") is None
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl=10)
+    cache.put(NAMESPACE, "q", {"v": 1})
+    clock.now += 9
+    assert cache.get(NAMESPACE, "q") == {"v": 1}
+    clock.now += 2
+    assert cache.get(NAMESPACE, "q") is None
+    assert cache.stats()["memory_items"] == 0
+
+
+def test_memory_tier_evicts_least_recently_used(clock):
+    cache = ResponseCache(max_memory_items=2)
+    cache.put(NAMESPACE, "a", 1)
+    cache.put(NAMESPACE, "b", 2)
+    assert cache.get(NAMESPACE, "a") == 1
+    cache.put(NAMESPACE, "c", 3)
+    assert cache.get(NAMESPACE, "b") is None
+    assert cache.get(NAMESPACE, "a") == 1
+    assert cache.get(NAMESPACE, "c") == 3
+
+
+def test_disk_tier_survives_memory_eviction_and_restart(clock, tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path, max_memory_items=1)
+    cache.put(NAMESPACE, "a", {"v": "a"})
+    cache.put(NAMESPACE, "b", {"v": "b"})
+    assert cache.get(NAMESPACE, "a") == {"v": "a"}
+    assert ResponseCache(path).get(NAMESPACE, "b") == {"v": "b"}
+
+
+def test_semantic_hit_above_threshold_only(clock):
+    cache = ResponseCache(embedder=topic_embedder, similarity_threshold=0.95)
+    cache.put(NAMESPACE, "weather at the summit tomorrow", {"v": "weather"})
+    assert cache.get(NAMESPACE, "tomorrow's weather") == {"v": "weather"}
+    assert cache.get(NAMESPACE, "nearest pharmacy") is None
+    stats = cache.stats()
+    assert (stats["semantic_hits"], stats["misses"]) == (1, 1)
+
+
+def test_semantic_index_is_pruned_and_rescored_without_disk(clock):
+    cache = ResponseCache(max_memory_items=2, embedder=topic_embedder, similarity_threshold=0.5)
+    cache.put(NAMESPACE, "weather", {"v": "weather"})
+    cache.put(NAMESPACE, "weather and trail", {"v": "weather and trail"})
+    cache.put(NAMESPACE, "pharmacy", {"v": "pharmacy"})
+    # The evicted "weather" entry left the index, so the next best live match answers
+    assert len(cache._semantic[NAMESPACE]["keys"]) == 2
+    assert cache.get(NAMESPACE, "weather today") == {"v": "weather and trail"}
+
+    # An expired best match is dropped and not served; the unrelated entry stays until looked up
+    clock.now += cache.ttl + 1
+    assert cache.get(NAMESPACE, "weather today") is None
+    assert len(cache._semantic[NAMESPACE]["keys"]) == 1
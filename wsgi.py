@@ -1,10 +1,21 @@
+import os
 from app import app as application
+from app.mongo.fsq_handlers import HEALTH_DATA_HANDLER, ensure_all_indexes
 
 app = application
 
+# Idempotent; set MONGO_ENSURE_INDEXES=false to provision via `python -m app.mongo.indexes` instead
+if os.getenv("MONGO_ENSURE_INDEXES", "true").lower() == "true":
+    ensure_all_indexes()
+
+# Points stored before readings existed, or whose background sync was interrupted, are
+# synced once at startup; set HEALTH_SYNC_ON_STARTUP=false to run `python -m app.mongo.health_sync` instead
+if os.getenv("HEALTH_SYNC_ON_STARTUP", "true").lower() == "true":
+    HEALTH_DATA_HANDLER.schedule_backfill()
+
 if __name__ == "__main__":
     application.run(
         host='0.0.0.0',
         port=8080,
         # ssl_context=('https_cert.pem', 'https_key.pem')  # Add your certificate and key file paths here
-    )
\ No newline at end of file
+    )